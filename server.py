@@ -7,22 +7,30 @@ handling Google Cloud authentication automatically using default credentials.
 """
 
 import asyncio
+import gzip
+import hashlib
+import itertools
 import json
 import mimetypes
 import os
 import ssl
 
 import certifi
-
-# Google auth imports
-import google.auth
 import websockets
 from aiohttp import web
-from google.auth.transport.requests import Request
 from websockets.exceptions import ConnectionClosed
 from websockets.legacy.protocol import WebSocketCommonProtocol
 from websockets.legacy.server import WebSocketServerProtocol
 
+# Shared with the telephony service (stdlib/google-auth only; no other imports from that tree)
+from telephony.event_log import EventLogger, configure_logging, get_logger, parse_event_rates, shutdown_logging
+from telephony.token_cache import AccessTokenCache
+
+try:
+    import brotli
+except ImportError:  # optional: .br variants of static assets
+    brotli = None
+
 def _env_bool(name: str, default: bool) -> bool:
     value = os.getenv(name)
     if value is None:
@@ -37,55 +45,130 @@ DEBUG = _env_bool("DEBUG", False)  # Set to True for verbose logging
 HTTP_PORT = int(os.getenv("HTTP_PORT", "3001"))  # Port for HTTP server
 WS_PORT = int(os.getenv("WS_PORT", "9001"))  # Port for WebSocket server (internal; proxy via nginx /geminiWs)
 
+# Forward proxied frames byte-for-byte (text stays text, binary stays binary). Set to false to get the
+# old behaviour of re-serializing every message through json.loads/json.dumps.
+PROXY_PASSTHROUGH = _env_bool("PROXY_PASSTHROUGH", True)
+# Log every Nth proxied message per direction (0 = none; DEBUG alone logs every message)
+PROXY_INSPECT_EVERY = int(os.getenv("PROXY_INSPECT_EVERY", "0"))
+
+# JSON log lines are encoded and written by a background thread (telephony/event_log.py, same LOG_*
+# settings and defaults as the telephony service). Each event type is limited to LOG_RATE_PER_EVENT
+# records/s ("event=rate,..." overrides in LOG_EVENT_RATES) and string fields are cut at
+# LOG_MAX_FIELD_CHARS (base64 audio is large).
+LOG_ROOT = "gemini_proxy"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "debug" if DEBUG else "info").lower()
+LOG_RATE_PER_EVENT = float(os.getenv("LOG_RATE_PER_EVENT", "20"))
+LOG_EVENT_RATES = os.getenv("LOG_EVENT_RATES", "")
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "512"))
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+
+# Static UI assets are served from memory; STATIC_DEV=true re-scans frontend/ for edits every second
+STATIC_DEV = _env_bool("STATIC_DEV", False)
+STATIC_MAX_AGE_S = int(os.getenv("STATIC_MAX_AGE_S", "300"))
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+
+logger = get_logger(root_name=LOG_ROOT)
+_connection_ids = itertools.count(1)
+
+
+# Same cache as the telephony service: refreshes run in a worker thread ahead of expiry, so new
+# clients get the token without touching the network.
+token_cache = AccessTokenCache()
+
 
-def generate_access_token():
-    """Retrieves an access token using Google Cloud default credentials."""
+def _on_token_refresh(seconds, error):
+    if error:
+        logger.warning("token_refresh_failed", ms=round(seconds * 1000), error=error)
+    else:
+        logger.info("token_refreshed", ms=round(seconds * 1000))
+
+
+token_cache.on_refresh = _on_token_refresh
+
+
+async def generate_access_token():
+    """Returns an access token from the shared cache of Google Cloud default credentials."""
     try:
-        creds, _ = google.auth.default()
-        if not creds.valid:
-            creds.refresh(Request())
-        return creds.token
+        return await token_cache.get_token()
     except Exception as e:
-        print(f"Error generating access token: {e}")
-        print("Make sure you're logged in with: gcloud auth application-default login")
+        logger.error(
+            "token_unavailable", error=str(e), hint="gcloud auth application-default login"
+        )
         return None
 
 
+class ProxyStats:
+    """Per-connection message/byte counters for one direction of the proxy."""
+
+    def __init__(self, direction: str):
+        self.direction = direction
+        self.messages = 0
+        # Text frames are counted by length: the JSON/base64 Gemini traffic is ASCII.
+        self.bytes = 0
+        self.inspected = 0
+
+    def __str__(self):
+        return f"{self.direction}: {self.messages} msgs, {self.bytes / 1024:.1f} KiB"
+
+
+def _inspect_interval():
+    if PROXY_INSPECT_EVERY > 0:
+        return PROXY_INSPECT_EVERY
+    return 1 if DEBUG else 0
+
+
 async def proxy_task(
     source_websocket: WebSocketCommonProtocol,
     destination_websocket: WebSocketCommonProtocol,
     is_server: bool,
+    stats: ProxyStats = None,
+    log: EventLogger = logger,
 ) -> None:
     """Forwards messages from source_websocket to destination_websocket.
 
+    In passthrough mode (default) frames are forwarded unchanged and only every
+    `PROXY_INSPECT_EVERY`-th message (or every message with DEBUG) is logged; the log writer
+    thread truncates it, so nothing is decoded or copied here.
+
     Args:
         source_websocket: The WebSocket connection to receive messages from.
         destination_websocket: The WebSocket connection to send messages to.
         is_server: True if source is server side, False otherwise.
+        stats: Optional counters for this direction.
+        log: Logger carrying the connection context.
     """
+    side = "server" if is_server else "client"
+    stats = stats or ProxyStats(side)
+    inspect_every = _inspect_interval()
     try:
         async for message in source_websocket:
+            stats.messages += 1
+            stats.bytes += len(message)
+            if inspect_every and stats.messages % inspect_every == 0:
+                stats.inspected += 1
+                if isinstance(message, str):
+                    log.info("proxy_message", side=side, n=stats.messages, chars=len(message), message=message)
+                else:
+                    log.info("proxy_message", side=side, n=stats.messages, bytes=len(message))
+            if PROXY_PASSTHROUGH:
+                await destination_websocket.send(message)
+                continue
             try:
                 data = json.loads(message)
-                if DEBUG:
-                    print(
-                        f"Proxying from {'server' if is_server else 'client'}: {data}"
-                    )
                 await destination_websocket.send(json.dumps(data))
             except Exception as e:
-                print(f"Error processing message: {e}")
+                log.warning("proxy_message_error", side=side, error=str(e))
     except ConnectionClosed as e:
-        print(
-            f"{'Server' if is_server else 'Client'} connection closed: {e.code} - {e.reason}"
-        )
+        log.info("proxy_closed", side=side, code=e.code, reason=e.reason)
     except Exception as e:
-        print(f"Unexpected error in proxy_task: {e}")
+        log.error("proxy_error", side=side, error=str(e))
     finally:
         await destination_websocket.close()
 
 
 async def create_proxy(
-    client_websocket: WebSocketCommonProtocol, bearer_token: str, service_url: str
+    client_websocket: WebSocketCommonProtocol, bearer_token: str, service_url: str, log: EventLogger = logger
 ) -> None:
     """Establishes a WebSocket connection to the Gemini server and creates bidirectional proxy.
 
@@ -93,18 +176,19 @@ async def create_proxy(
         client_websocket: The WebSocket connection of the client.
         bearer_token: The bearer token for authentication with the server.
         service_url: The url of the service to connect to.
+        log: Logger carrying the connection context.
     """
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {bearer_token}",
     }
 
-    # Create SSL context with certifi certificates
-    ssl_context = ssl.create_default_context(cafile=certifi.where())
+    # Create SSL context with certifi certificates (plain ws:// is only for local stand-ins)
+    ssl_context = None
+    if service_url.startswith("wss://"):
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
 
-    print("Connecting to Gemini API...")
-    if DEBUG:
-        print(f"Service URL: {service_url}")
+    log.debug("gemini_connecting", service_url=service_url)
 
     try:
         # websockets' header kwarg varies by version. Use the widely supported
@@ -112,14 +196,16 @@ async def create_proxy(
         async with websockets.connect(
             service_url, extra_headers=headers, ssl=ssl_context
         ) as server_websocket:
-            print("✅ Connected to Gemini API")
+            log.info("gemini_connected")
 
             # Create bidirectional proxy tasks
+            upstream = ProxyStats("client→server")
+            downstream = ProxyStats("server→client")
             client_to_server_task = asyncio.create_task(
-                proxy_task(client_websocket, server_websocket, is_server=False)
+                proxy_task(client_websocket, server_websocket, is_server=False, stats=upstream, log=log)
             )
             server_to_client_task = asyncio.create_task(
-                proxy_task(server_websocket, client_websocket, is_server=True)
+                proxy_task(server_websocket, client_websocket, is_server=True, stats=downstream, log=log)
             )
 
             # Wait for either task to complete
@@ -136,6 +222,14 @@ async def create_proxy(
                 except asyncio.CancelledError:
                     pass
 
+            log.info(
+                "proxy_session_closed",
+                upstream_messages=upstream.messages,
+                upstream_bytes=upstream.bytes,
+                downstream_messages=downstream.messages,
+                downstream_bytes=downstream.bytes,
+            )
+
             # Close connections
             try:
                 await server_websocket.close()
@@ -148,11 +242,11 @@ async def create_proxy(
                 pass
 
     except ConnectionClosed as e:
-        print(f"Server connection closed unexpectedly: {e.code} - {e.reason}")
+        log.warning("gemini_closed", code=e.code, reason=e.reason)
         if not client_websocket.closed:
             await client_websocket.close(code=e.code, reason=e.reason)
     except Exception as e:
-        print(f"Failed to connect to Gemini API: {e}")
+        log.error("gemini_connect_failed", error=str(e))
         if not client_websocket.closed:
             await client_websocket.close(code=1008, reason="Upstream connection failed")
 
@@ -166,7 +260,8 @@ async def handle_websocket_client(client_websocket: WebSocketServerProtocol) ->
     Args:
         client_websocket: The WebSocket connection of the client.
     """
-    print("🔌 New WebSocket client connection...")
+    log = logger.bind(conn=next(_connection_ids))
+    log.info("client_connected")
     try:
         # Wait for the first message from the client
         service_setup_message = await asyncio.wait_for(
@@ -179,36 +274,149 @@ async def handle_websocket_client(client_websocket: WebSocketServerProtocol) ->
 
         # If no bearer token provided, generate one using default credentials
         if not bearer_token:
-            print("🔑 Generating access token using default credentials...")
-            bearer_token = generate_access_token()
+            bearer_token = await generate_access_token()
             if not bearer_token:
-                print("❌ Failed to generate access token")
+                log.error("client_auth_failed")
                 await client_websocket.close(code=1008, reason="Authentication failed")
                 return
-            print("✅ Access token generated")
 
         if not service_url:
-            print("❌ Error: Service URL is missing")
+            log.warning("client_missing_service_url")
             await client_websocket.close(code=1008, reason="Service URL is required")
             return
 
-        await create_proxy(client_websocket, bearer_token, service_url)
+        await create_proxy(client_websocket, bearer_token, service_url, log=log)
 
     except asyncio.TimeoutError:
-        print("⏱️ Timeout waiting for the first message from the client")
+        log.warning("client_setup_timeout")
         await client_websocket.close(code=1008, reason="Timeout")
     except json.JSONDecodeError as e:
-        print(f"❌ Invalid JSON in first message: {e}")
+        log.warning("client_invalid_json", error=str(e))
         await client_websocket.close(code=1008, reason="Invalid JSON")
     except Exception as e:
-        print(f"❌ Error handling client: {e}")
+        log.error("client_error", error=str(e))
         if not client_websocket.closed:
             await client_websocket.close(code=1011, reason="Internal error")
 
 
 # HTTP server for static files
+_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+class StaticAsset:
+    """One file from frontend/, held in memory with its precompressed variants."""
+
+    def __init__(self, path: str, body: bytes, stamp):
+        self.stamp = stamp  # (mtime_ns, size) when loaded
+        content_type, _ = mimetypes.guess_type(path)
+        self.content_type = content_type or "application/octet-stream"
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.tag = digest
+        if STATIC_DEV or path.endswith(".html"):
+            # Unhashed file names: always revalidate (cheap with ETag/304)
+            self.cache_control = "no-cache"
+        else:
+            self.cache_control = f"public, max-age={STATIC_MAX_AGE_S}"
+
+        # encoding -> (body, etag); strong ETags differ per representation
+        self.variants = {"identity": (body, f'"{digest}"')}
+        if self.content_type.startswith(_COMPRESSIBLE_TYPES) and len(body) > 256:
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body):
+                self.variants["gzip"] = (gz, f'"{digest}-gz"')
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body):
+                    self.variants["br"] = (br, f'"{digest}-br"')
+
+
+def _scan_frontend(root: str, previous=None):
+    """Load every file under `root` (reusing unchanged entries from `previous`)."""
+    previous = previous or {}
+    assets = {}
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            full = os.path.join(dirpath, name)
+            rel = os.path.relpath(full, root).replace(os.sep, "/")
+            try:
+                st = os.stat(full)
+                stamp = (st.st_mtime_ns, st.st_size)
+                old = previous.get(rel)
+                if old is not None and old.stamp == stamp:
+                    assets[rel] = old
+                    continue
+                with open(full, "rb") as f:
+                    assets[rel] = StaticAsset(rel, f.read(), stamp)
+            except OSError as e:
+                logger.error("static_load_failed", file=rel, error=str(e))
+    return assets
+
+
+class StaticAssetCache:
+    """frontend/ in memory: no disk access or compression on the request path."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.assets = {}
+        self.watch_task = None
+
+    def load(self):
+        self.assets = _scan_frontend(self.root)
+        total = sum(len(a.variants["identity"][0]) for a in self.assets.values())
+        logger.info("static_cached", files=len(self.assets), kib=round(total / 1024), brotli=brotli is not None)
+
+    async def watch(self, interval_s: float = 1.0):
+        """Dev mode: re-scan in a worker thread and swap in edited / new / deleted files."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval_s)
+            try:
+                assets = await loop.run_in_executor(None, _scan_frontend, self.root, self.assets)
+            except Exception as e:
+                logger.error("static_rescan_failed", error=str(e))
+                continue
+            changed = [k for k, a in assets.items() if self.assets.get(k) is not a]
+            removed = [k for k in self.assets if k not in assets]
+            if changed or removed:
+                logger.info("static_reloaded", files=changed + removed)
+            self.assets = assets
+
+
+static_cache = StaticAssetCache(FRONTEND_DIR)
+
+
+def _accepted_encodings(header: str):
+    """Accept-Encoding -> set of codings with q > 0."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match: str, asset: StaticAsset) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # Any representation of the same content is still fresh
+        if candidate.strip('"').split("-", 1)[0] == asset.tag:
+            return True
+    return False
+
+
 async def serve_static_file(request):
-    """Serve static files from the frontend directory."""
+    """Serve static files from the in-memory frontend cache."""
     path = request.match_info.get("path", "index.html")
 
     # Security: prevent directory traversal
@@ -220,31 +428,34 @@ async def serve_static_file(request):
     if not path or path == "/":
         path = "index.html"
 
-    # Get the full file path - serve from frontend folder
-    frontend_dir = os.path.join(os.path.dirname(__file__), "frontend")
-    file_path = os.path.join(frontend_dir, path)
-
-    # Check if file exists
-    if not os.path.exists(file_path) or not os.path.isfile(file_path):
+    asset = static_cache.assets.get(path)
+    if asset is None:
         return web.Response(text="File not found", status=404)
 
-    # Determine content type
-    content_type, _ = mimetypes.guess_type(file_path)
-    if content_type is None:
-        content_type = "application/octet-stream"
+    accepted = _accepted_encodings(request.headers.get("Accept-Encoding", ""))
+    encoding = "identity"
+    for candidate in ("br", "gzip"):
+        if candidate in asset.variants and candidate in accepted:
+            encoding = candidate
+            break
+    body, etag = asset.variants[encoding]
 
-    # Read and serve the file
-    try:
-        with open(file_path, "rb") as f:
-            content = f.read()
-        return web.Response(body=content, content_type=content_type)
-    except Exception as e:
-        print(f"Error serving file {path}: {e}")
-        return web.Response(text="Internal server error", status=500)
+    headers = {"ETag": etag, "Cache-Control": asset.cache_control, "Vary": "Accept-Encoding"}
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _etag_matches(if_none_match, asset):
+        return web.Response(status=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return web.Response(body=body, content_type=asset.content_type, headers=headers)
 
 
 async def start_http_server():
     """Start the HTTP server for serving static files."""
+    static_cache.load()
+    if STATIC_DEV:
+        static_cache.watch_task = asyncio.create_task(static_cache.watch())
+
     app = web.Application()
     app.router.add_get("/", serve_static_file)
     app.router.add_get("/{path:.*}", serve_static_file)
@@ -253,13 +464,13 @@ async def start_http_server():
     await runner.setup()
     site = web.TCPSite(runner, "0.0.0.0", HTTP_PORT)
     await site.start()
-    print(f"🌐 HTTP server running on http://localhost:{HTTP_PORT}")
+    logger.info("http_listening", url=f"http://localhost:{HTTP_PORT}")
 
 
 async def start_websocket_server():
     """Start the WebSocket proxy server."""
     async with websockets.serve(handle_websocket_client, "0.0.0.0", WS_PORT):
-        print(f"🔌 WebSocket proxy running on ws://localhost:{WS_PORT}")
+        logger.info("ws_listening", url=f"ws://localhost:{WS_PORT}")
         # Run forever
         await asyncio.Future()
 
@@ -286,12 +497,27 @@ async def main():
 ╚════════════════════════════════════════════════════════════╝
 """)
 
+    # Warm the shared token so the first client never waits on the metadata server
+    if await generate_access_token():
+        logger.info("token_cached")
+    token_cache.start()
+
     # Start both servers concurrently
     await asyncio.gather(start_http_server(), start_websocket_server())
 
 
 if __name__ == "__main__":
+    configure_logging(
+        level=LOG_LEVEL,
+        rate_per_event=LOG_RATE_PER_EVENT,
+        event_rates=parse_event_rates(LOG_EVENT_RATES),
+        max_field_chars=LOG_MAX_FIELD_CHARS,
+        queue_max=LOG_QUEUE_MAX,
+        root_name=LOG_ROOT,
+    )
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         print("\n👋 Servers stopped")
+    finally:
+        shutdown_logging()
@@ -0,0 +1,48 @@
+"""
+Per-worker admission control and drain state.
+
+New calls are refused at the `start` event (closed with a retryable code, 1013 "Try Again Later" by
+default, so the carrier can place the call on another worker/VM) when:
+- the worker is draining (SIGTERM received, in-flight calls finishing)
+- `max_calls` calls are already active in this worker
+- the event loop is lagging by more than `max_loop_lag_s` (peak-hold of recent lag samples, so one
+  quiet tick doesn't re-open admission in the middle of a CPU spike)
+
+Accepted calls are never shed: once CPU saturates, every call's audio suffers, so the limit is
+enforced only at the door.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+REASON_DRAINING = "draining"
+REASON_MAX_CALLS = "max_calls"
+REASON_LOOP_LAG = "loop_lag"
+
+
+class AdmissionController:
+    def __init__(self, max_calls: int = 0, max_loop_lag_s: float = 0.0, lag_decay: float = 0.8):
+        self.max_calls = max_calls  # 0 = unlimited
+        self.max_loop_lag_s = max_loop_lag_s  # 0 = off
+        # Per lag sample (every 250ms), the held lag decays by this factor unless a new peak arrives.
+        self.lag_decay = lag_decay
+        self.loop_lag_s = 0.0
+        self.draining = False
+        self.rejected: Dict[str, int] = {}
+
+    def observe_loop_lag(self, lag_s: float) -> None:
+        self.loop_lag_s = max(lag_s, self.loop_lag_s * self.lag_decay)
+
+    def check(self, active_calls: int) -> Optional[str]:
+        """None if a new call may start, else the rejection reason."""
+        reason = None
+        if self.draining:
+            reason = REASON_DRAINING
+        elif self.max_calls and active_calls >= self.max_calls:
+            reason = REASON_MAX_CALLS
+        elif self.max_loop_lag_s and self.loop_lag_s > self.max_loop_lag_s:
+            reason = REASON_LOOP_LAG
+        if reason is not None:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        return reason
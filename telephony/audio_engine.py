@@ -0,0 +1,214 @@
+"""
+Tick-driven batched audio engine (optional, `AUDIO_ENGINE_TICK_MS`).
+
+Without it every call resamples its own chunks in its own coroutine: per uplink chunk and per Gemini
+audio message a handful of small NumPy calls whose fixed overhead dwarfs the arithmetic at 8-24kHz.
+With the engine, calls only `submit()` audio to their `EngineStream`s. One task wakes every tick,
+groups what is pending across all calls by filter and phase, and resamples each group with
+`resample_batch()` (one matrix product per filter phase for the whole group). It then hands every
+result back to its stream's `deliver` callback, in submission order per stream.
+
+- per-stream state stays in the call's `StreamingResampler`; the batch works on snapshots, and the
+  new state is committed back on the event loop
+- a stream with several chunks pending is handled over successive rounds of the same tick, so its
+  filter state chains exactly as with per-call processing (output is sample-identical)
+- `use_thread=True` runs the batch maths on a worker thread (NumPy releases the GIL in the matrix
+  products), leaving the loop to socket I/O meanwhile. A stream reset (barge-in) or closed while
+  its batch is in flight discards the result
+- cost: up to one tick of extra latency per direction
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import metrics
+from audio_processor import StreamingResampler, resample_batch
+from event_log import get_logger
+
+LOG = get_logger("audio_engine")
+
+
+@dataclass
+class AudioEngineStats:
+    ticks: int = 0
+    chunks: int = 0
+    batches: int = 0
+    max_batch: int = 0
+    overruns: int = 0  # ticks whose work took longer than the tick itself
+    restarts: int = 0  # engine task failures (logged, then restarted)
+    busy_s: float = 0.0
+
+
+class EngineStream:
+    """One direction of one call: a resampler plus where its output goes."""
+
+    def __init__(
+        self,
+        engine: "AudioEngine",
+        resampler: StreamingResampler,
+        deliver: Callable[[Any], None],
+        post: Optional[Callable[[np.ndarray], Any]] = None,
+        stage: str = "",
+    ):
+        self.engine = engine
+        self.resampler = resampler
+        self.deliver = deliver
+        # Per-chunk finishing step run with the batch (e.g. base64 for the uplink), off the loop too
+        self.post = post
+        self.stage = stage  # FRAME_SECONDS label for the amortized per-chunk cost
+        self.epoch = 0
+        self.closed = False
+        self.pending: Deque[np.ndarray] = deque()
+
+    def submit(self, samples: np.ndarray) -> None:
+        if self.closed or not samples.size:
+            return
+        # Copy: uplink chunks are views into the call's ring buffer, reused before the next tick.
+        self.pending.append(np.array(samples, dtype=np.int16))
+        self.engine._ready.add(self)
+
+    def reset(self) -> None:
+        """Drop pending audio and filter state (barge-in); in-flight results are discarded."""
+        self.epoch += 1
+        self.pending.clear()
+        self.engine._ready.discard(self)
+        self.resampler.reset()
+
+    def close(self) -> None:
+        self.closed = True
+        self.pending.clear()
+        self.engine._ready.discard(self)
+
+
+# (stream, epoch at submission, chunk)
+_Item = Tuple[EngineStream, int, np.ndarray]
+
+
+def _run_group(group: List[_Item], histories: np.ndarray, t: int) -> Tuple[List[Any], np.ndarray, List[int]]:
+    resampler = group[0][0].resampler
+    outs, new_histories, next_t = resample_batch(resampler, histories, t, [item[2] for item in group])
+    results = [stream.post(out) if stream.post is not None else out for (stream, _, _), out in zip(group, outs)]
+    return results, new_histories, next_t
+
+
+class AudioEngine:
+    def __init__(self, tick_ms: int = 20, use_thread: bool = False):
+        self.tick_s = tick_ms / 1000.0
+        self.stats = AudioEngineStats()
+        self._ready: "set[EngineStream]" = set()
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-engine") if use_thread else None
+        )
+
+    def stream(
+        self,
+        resampler: StreamingResampler,
+        deliver: Callable[[Any], None],
+        post: Optional[Callable[[np.ndarray], Any]] = None,
+        stage: str = "",
+    ) -> EngineStream:
+        return EngineStream(self, resampler, deliver, post, stage)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+        self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        if self._closed or task.cancelled():
+            return
+        exc = task.exception()
+        # Every call in the worker goes silent without the engine: log and restart it.
+        self.stats.restarts += 1
+        LOG.error("audio_engine_failed", exc_info=(type(exc), exc, exc.__traceback__), error=str(exc))
+        self._ready = {s for s in self._ready if s.pending and not s.closed}
+        self.start()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while not self._closed:
+            deadline += self.tick_s
+            delay = deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.stats.overruns += 1
+                deadline = loop.time()  # don't try to catch up with a burst of ticks
+            await self.tick()
+
+    async def tick(self) -> None:
+        st = self.stats
+        st.ticks += 1
+        started = time.perf_counter()
+        while self._ready:
+            await self._round()
+        st.busy_s += time.perf_counter() - started
+
+    async def _round(self) -> None:
+        """Process the oldest pending chunk of every ready stream."""
+        groups: Dict[tuple, List[_Item]] = {}
+        for stream in self._ready:
+            if not stream.pending:
+                continue
+            item = (stream, stream.epoch, stream.pending.popleft())
+            groups.setdefault(stream.resampler.filter_key + (stream.resampler.state()[1],), []).append(item)
+        self._ready = {s for s in self._ready if s.pending}
+
+        for key, group in groups.items():
+            t = key[-1]
+            histories = np.stack([stream.resampler.state()[0] for stream, _, _ in group])
+            t0 = time.perf_counter()
+            if self._executor is not None:
+                results, new_histories, next_t = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, _run_group, group, histories, t
+                )
+            else:
+                results, new_histories, next_t = _run_group(group, histories, t)
+            per_chunk = (time.perf_counter() - t0) / len(group)
+
+            st = self.stats
+            st.batches += 1
+            st.chunks += len(group)
+            st.max_batch = max(st.max_batch, len(group))
+            for i, (stream, epoch, _) in enumerate(group):
+                if stream.closed or stream.epoch != epoch:
+                    continue  # reset/closed while the batch ran
+                stream.resampler.commit(new_histories[i], next_t[i])
+                if stream.stage:
+                    metrics.FRAME_SECONDS.observe(per_chunk, stage=stream.stage)
+                try:
+                    stream.deliver(results[i])
+                except Exception as e:
+                    # One call's failure must not stop the engine for every other call.
+                    LOG.error("engine_deliver_failed", stage=stream.stage, error=str(e))
+
+    def summary(self) -> Dict[str, Any]:
+        st = self.stats
+        return {
+            "ticks": st.ticks,
+            "chunks": st.chunks,
+            "batches": st.batches,
+            "mean_batch": round(st.chunks / st.batches, 1) if st.batches else 0.0,
+            "max_batch": st.max_batch,
+            "overruns": st.overruns,
+            "restarts": st.restarts,
+            "busy_fraction": round(st.busy_s / (st.ticks * self.tick_s), 3) if st.ticks else 0.0,
+        }
+
+    def close(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
@@ -5,17 +5,26 @@ Audio processing for Waybeo telephony ↔ Gemini Live.
 - Gemini input: 16kHz int16 PCM (base64)
 - Gemini output: typically 24kHz int16 PCM (base64) → downsample back to 8kHz for telephony
 
-We use librosa for high-quality resampling (same approach as the singleinterface telephony release).
+G.711 μ-law / A-law (8-bit companded 8kHz audio, as many carriers deliver it) is converted with
+precomputed lookup tables: 256 entries for decode, 65536 (one per int16 value) for encode, so a
+whole frame converts with one NumPy indexing operation.
+
+Resampling uses a streaming polyphase FIR (`StreamingResampler`): filters are designed once per
+rate pair, filter history is carried across chunks (no discontinuities at 200ms frame boundaries),
+and everything stays in NumPy on int16 buffers. `resample_batch()` runs the same filter over many
+streams at once (one matrix product per filter phase for all of them), for the optional audio engine.
 """
 
 from __future__ import annotations
 
 import base64
 from dataclasses import dataclass
-from typing import List
+from functools import lru_cache
+from math import gcd
+from typing import List, Optional, Sequence, Tuple, Union
 
-import librosa
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 @dataclass(frozen=True)
@@ -25,9 +34,232 @@ class AudioRates:
     gemini_output_sr: int = 24000
 
 
+ENCODING_PCM16 = "pcm16"
+ENCODING_MULAW = "mulaw"
+ENCODING_ALAW = "alaw"
+ENCODINGS = (ENCODING_PCM16, ENCODING_MULAW, ENCODING_ALAW)
+
+_ENCODING_ALIASES = {
+    "pcm16": ENCODING_PCM16,
+    "linear16": ENCODING_PCM16,
+    "l16": ENCODING_PCM16,
+    "mulaw": ENCODING_MULAW,
+    "ulaw": ENCODING_MULAW,
+    "pcmu": ENCODING_MULAW,
+    "g711u": ENCODING_MULAW,
+    "g711ulaw": ENCODING_MULAW,
+    "g711mulaw": ENCODING_MULAW,
+    "alaw": ENCODING_ALAW,
+    "pcma": ENCODING_ALAW,
+    "g711a": ENCODING_ALAW,
+    "g711alaw": ENCODING_ALAW,
+}
+
+Payload = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+def normalize_encoding(name: Optional[str]) -> Optional[str]:
+    """Map a carrier's codec name (e.g. "PCMU", "audio/x-mulaw", "g711_alaw") to one of ENCODINGS."""
+    if not name:
+        return ENCODING_PCM16
+    key = str(name).lower().rsplit("/", 1)[-1].replace("x-", "").replace("_", "").replace("-", "")
+    return _ENCODING_ALIASES.get(key)
+
+
+@lru_cache(maxsize=None)
+def _g711_tables(law: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(decode: 256 x int16, encode: 65536 x uint8 indexed by the int16 value's uint16 bits)."""
+    codes = np.arange(256, dtype=np.int32)
+    pcm = np.arange(65536, dtype=np.int32).astype(np.uint16).view(np.int16).astype(np.int32)
+
+    if law == ENCODING_MULAW:
+        u = ~codes & 0xFF
+        t = (((u & 0x0F) << 3) + 0x84) << ((u & 0x70) >> 4)
+        decode = np.where(u & 0x80, 0x84 - t, t - 0x84)
+
+        x = pcm >> 2  # 14-bit
+        mask = np.where(x < 0, 0x7F, 0xFF)
+        x = np.minimum(np.abs(x), 8159) + 0x21
+        seg = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), x)
+        uval = (seg << 4) | ((x >> (seg + 1)) & 0x0F)
+        encode = np.where(seg >= 8, 0x7F, uval) ^ mask
+    elif law == ENCODING_ALAW:
+        a = codes ^ 0x55
+        seg = (a & 0x70) >> 4
+        t = (a & 0x0F) << 4
+        t = np.where(seg == 0, t + 8, (t + 0x108) << np.maximum(seg - 1, 0))
+        decode = np.where(a & 0x80, t, -t)
+
+        x = pcm >> 3  # 13-bit
+        mask = np.where(x >= 0, 0xD5, 0x55)
+        x = np.where(x >= 0, x, -x - 1)
+        seg = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), x)
+        aval = (seg << 4) | np.where(seg < 2, (x >> 1) & 0x0F, (x >> np.maximum(seg, 1)) & 0x0F)
+        encode = np.where(seg >= 8, 0x7F, aval) ^ mask
+    else:
+        raise ValueError(f"Not a G.711 law: {law!r}")
+    return decode.astype(np.int16), (encode & 0xFF).astype(np.uint8)
+
+
+def g711_decode(payload: Payload, law: str) -> np.ndarray:
+    """G.711 codes (1 byte/sample) -> int16 samples."""
+    codes = payload if isinstance(payload, np.ndarray) else np.frombuffer(payload, dtype=np.uint8)
+    return _g711_tables(law)[0][codes]
+
+
+def g711_encode(samples: np.ndarray, law: str) -> np.ndarray:
+    """int16 samples -> G.711 codes (uint8)."""
+    return _g711_tables(law)[1][samples.astype(np.int16, copy=False).view(np.uint16)]
+
+
+@lru_cache(maxsize=None)
+def _design_polyphase(up: int, down: int, zero_crossings: int) -> np.ndarray:
+    """Kaiser-windowed sinc low-pass split into `up` phases, each reversed for dot products.
+
+    Returns an array of shape (up, taps_per_phase), float32, with unity DC gain.
+    """
+    factor = max(up, down)
+    taps_per_phase = -(-(2 * zero_crossings * factor + 1) // up)
+    n = taps_per_phase * up
+    cutoff = 0.5 / factor  # cycles/sample at the upsampled rate
+    m = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+    h = 2.0 * cutoff * np.sinc(2.0 * cutoff * m) * np.kaiser(n, 8.0)
+    h *= up / h.sum()
+    # h[p + k*up] is tap k of phase p; reverse taps so a forward window can be used directly
+    phases = h.reshape(taps_per_phase, up).T[:, ::-1]
+    return np.ascontiguousarray(phases, dtype=np.float32)
+
+
+class StreamingResampler:
+    """Stateful rational-ratio resampler for continuous int16 streams.
+
+    One instance per stream direction per call. `process()` can be fed arbitrary chunk sizes; the
+    output is identical to resampling the concatenated stream in one go (minus the filter delay).
+    """
+
+    def __init__(self, orig_sr: int, target_sr: int, gain: float = 1.0, zero_crossings: int = 8):
+        g = gcd(orig_sr, target_sr)
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self.up = target_sr // g
+        self.down = orig_sr // g
+        self.gain = gain
+        self._phases = _design_polyphase(self.up, self.down, zero_crossings)
+        self._taps = self._phases.shape[1]
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop filter history (e.g. after barge-in, so stale audio does not leak into new audio)."""
+        self._history = np.zeros(self._taps - 1, dtype=np.float32)
+        # Position of the next output sample on the upsampled grid, relative to the next input chunk.
+        self._t = 0
+
+    def _plan(self, n_in: int, t: Optional[int] = None) -> Tuple[int, int]:
+        t = self._t if t is None else t
+        total = n_in * self.up
+        if total <= t:
+            return 0, t - total
+        n_out = -(-(total - t) // self.down)
+        return n_out, t + n_out * self.down - total
+
+    @property
+    def filter_key(self) -> Tuple[int, int, int, float]:
+        """Streams with equal keys share a filter and can be resampled in one batch."""
+        return (self.up, self.down, self._taps, self.gain)
+
+    def state(self) -> Tuple[np.ndarray, int]:
+        """(filter history, output phase): the streaming state `resample_batch()` starts from."""
+        return self._history, self._t
+
+    def commit(self, history: np.ndarray, t: int) -> None:
+        """Adopt the state returned by `resample_batch()` for this stream."""
+        self._history = history
+        self._t = t
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if samples.size == 0:
+            return np.zeros(0, dtype=np.int16)
+        if self.up == 1 and self.down == 1 and self.gain == 1.0:
+            return samples.astype(np.int16, copy=False)
+
+        x = np.concatenate((self._history, samples.astype(np.float32, copy=False)))
+        n_in = samples.size
+        n_out, next_t = self._plan(n_in)
+
+        out = np.empty(n_out, dtype=np.float32)
+        if n_out:
+            windows = sliding_window_view(x, self._taps)
+            up, down = self.up, self.down
+            # Outputs r, r+up, r+2*up, ... share a filter phase and step `down` inputs apart,
+            # so each phase is a single strided matrix-vector product.
+            for r in range(min(up, n_out)):
+                t = self._t + r * down
+                first, phase = divmod(t, up)
+                count = len(range(r, n_out, up))
+                out[r::up] = windows[first : first + count * down : down] @ self._phases[phase]
+
+        self._history = x[-(self._taps - 1) :].copy()
+        self._t = next_t
+
+        if self.gain != 1.0:
+            out *= self.gain
+        np.clip(np.rint(out, out=out), -32768, 32767, out=out)
+        return out.astype(np.int16)
+
+
+def resample_batch(
+    resampler: StreamingResampler, histories: np.ndarray, t: int, chunks: Sequence[np.ndarray]
+) -> Tuple[List[np.ndarray], np.ndarray, List[int]]:
+    """
+    `resampler.process()` for many streams at once; every stream must share `resampler.filter_key`
+    and the output phase `t`.
+
+    `histories` (one row per stream) are snapshots of the streams' `state()`. Chunks may differ in
+    length: rows are zero-padded, and the padding never reaches a valid output. Returns
+    (int16 output per stream, new history rows, next phase per stream), identical to calling
+    `process()` stream by stream. No resampler is modified (apply with `commit()`), so this can run
+    off the event loop.
+    """
+    lengths = [c.size for c in chunks]
+    n_max = max(lengths)
+    taps = resampler._taps
+    x = np.zeros((len(chunks), taps - 1 + n_max), dtype=np.float32)
+    x[:, : taps - 1] = histories
+    for row, chunk in zip(x, chunks):
+        row[taps - 1 : taps - 1 + chunk.size] = chunk
+
+    plans = [resampler._plan(n, t) for n in lengths]
+    n_out = max(p[0] for p in plans)
+    out = np.empty((len(chunks), n_out), dtype=np.float32)
+    if n_out:
+        windows = sliding_window_view(x, taps, axis=1)
+        up, down = resampler.up, resampler.down
+        for r in range(min(up, n_out)):
+            first, phase = divmod(t + r * down, up)
+            count = len(range(r, n_out, up))
+            out[:, r::up] = windows[:, first : first + count * down : down] @ resampler._phases[phase]
+    if resampler.gain != 1.0:
+        out *= resampler.gain
+    np.clip(np.rint(out, out=out), -32768, 32767, out=out)
+    out16 = out.astype(np.int16)
+
+    # The last taps-1 real samples of each row (history + chunk) become that stream's history.
+    idx = np.asarray(lengths)[:, None] + np.arange(taps - 1)
+    new_histories = np.take_along_axis(x, idx, axis=1)
+    return [out16[i, : plans[i][0]] for i in range(len(chunks))], new_histories, [p[1] for p in plans]
+
+
 class AudioProcessor:
-    def __init__(self, rates: AudioRates):
+    def __init__(self, rates: AudioRates, encoding: str = ENCODING_PCM16):
         self.rates = rates
+        self.encoding = ENCODING_PCM16
+        self.set_encoding(encoding)
+        # Per-session streaming state (one AudioProcessor is created per call).
+        self.input_resampler = StreamingResampler(rates.telephony_sr, rates.gemini_input_sr)
+        # gentle gain reduction on model audio to reduce clipping artifacts on the phone line
+        self.output_resampler = StreamingResampler(
+            rates.gemini_output_sr, rates.telephony_sr, gain=0.90
+        )
 
     @staticmethod
     def int16_to_float32(samples: np.ndarray) -> np.ndarray:
@@ -41,13 +273,10 @@ class AudioProcessor:
         return np.round(samples * 32767.0).astype(np.int16)
 
     def resample_int16(self, samples: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+        """One-shot (stateless) resample; live audio should go through the session resamplers."""
         if samples.size == 0 or orig_sr == target_sr:
             return samples.astype(np.int16, copy=False)
-        samples_f = self.int16_to_float32(samples)
-        out_f = librosa.resample(
-            samples_f, orig_sr=orig_sr, target_sr=target_sr, res_type="linear"
-        )
-        return self.float32_to_int16(out_f)
+        return StreamingResampler(orig_sr, target_sr).process(samples)
 
     @staticmethod
     def apply_fade(samples: np.ndarray, fade_samples: int = 16) -> np.ndarray:
@@ -66,24 +295,49 @@ class AudioProcessor:
     def np_to_waybeo_samples(self, samples: np.ndarray) -> List[int]:
         return samples.astype(np.int16, copy=False).tolist()
 
+    # ---- Telephony payload codec (binary / base64 transports) ----
+    def set_encoding(self, name: Optional[str]) -> None:
+        encoding = normalize_encoding(name)
+        if encoding is None:
+            raise ValueError(f"Unsupported audio encoding {name!r} (expected one of {ENCODINGS})")
+        self.encoding = encoding
+
+    def decode_payload(self, payload: Payload) -> np.ndarray:
+        """Telephony audio bytes in the session's encoding -> int16 samples."""
+        if self.encoding == ENCODING_PCM16:
+            return np.frombuffer(payload, dtype="<i2", count=len(payload) // 2).astype(np.int16, copy=False)
+        return g711_decode(payload, self.encoding)
+
+    def encode_payload(self, samples: np.ndarray) -> bytes:
+        """int16 samples -> telephony audio bytes in the session's encoding."""
+        if self.encoding == ENCODING_PCM16:
+            return np.ascontiguousarray(samples, dtype="<i2").tobytes()
+        return g711_encode(samples, self.encoding).tobytes()
+
+    # ---- Gemini audio payloads (base64 int16 PCM) ----
+    @staticmethod
+    def encode_gemini_b64(samples: np.ndarray) -> str:
+        return base64.b64encode(samples.tobytes()).decode("utf-8")
+
+    @staticmethod
+    def decode_gemini_b64(audio_b64: str) -> np.ndarray:
+        # Gemini audio output is int16 PCM
+        return np.frombuffer(base64.b64decode(audio_b64), dtype=np.int16)
+
     # ---- Input (Waybeo -> Gemini) ----
     def process_input_8k_to_gemini_16k_b64(self, samples_8k: np.ndarray) -> str:
-        samples_16k = self.resample_int16(
-            samples_8k, orig_sr=self.rates.telephony_sr, target_sr=self.rates.gemini_input_sr
-        )
-        return base64.b64encode(samples_16k.tobytes()).decode("utf-8")
+        return self.encode_gemini_b64(self.input_resampler.process(samples_8k))
 
     # ---- Output (Gemini -> Waybeo) ----
+    def process_output_gemini_b64_to_8k_np(self, audio_b64: str) -> np.ndarray:
+        # No per-chunk fade: the resampler is continuous across Gemini chunks.
+        return self.output_resampler.process(self.decode_gemini_b64(audio_b64))
+
     def process_output_gemini_b64_to_8k_samples(self, audio_b64: str) -> List[int]:
-        raw = base64.b64decode(audio_b64)
-        # Gemini audio output is int16 PCM
-        samples_out = np.frombuffer(raw, dtype=np.int16)
-        samples_8k = self.resample_int16(
-            samples_out,
-            orig_sr=self.rates.gemini_output_sr,
-            target_sr=self.rates.telephony_sr,
-        )
-        samples_8k = self.apply_fade(samples_8k)
-        return self.np_to_waybeo_samples(samples_8k)
+        return self.np_to_waybeo_samples(self.process_output_gemini_b64_to_8k_np(audio_b64))
+
+    def reset_output(self) -> None:
+        """Called on barge-in so the next model turn starts from a clean filter state."""
+        self.output_resampler.reset()
 
 
@@ -0,0 +1,195 @@
+"""
+Micro-benchmarks for every stage of `audio_processor.py` at realistic frame sizes.
+
+Each stage is timed per frame (20ms .. 200ms of audio) and reported as ns/sample and
+frames/sec/core. Results can be saved as JSON and compared against an earlier run, so a change to
+resampling or buffering comes with numbers for the per-frame cost that sets calls-per-core.
+The "batched" stages time one `resample_batch()` over `BATCH_STREAMS` calls' frames (what the audio
+engine does per tick) and report the cost per frame.
+
+    cd telephony
+    python3 bench_audio_processor.py --json before.json
+    # ... change something ...
+    python3 bench_audio_processor.py --json after.json --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import platform
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from audio_processor import (
+    AudioProcessor,
+    AudioRates,
+    StreamingResampler,
+    g711_decode,
+    g711_encode,
+    resample_batch,
+)
+
+FRAME_MS = (20, 40, 100, 200)
+BATCH_STREAMS = 100
+
+
+def _bench(fn: Callable[[], object], min_time_s: float) -> float:
+    """Seconds per call: warm up, then repeat until `min_time_s` has elapsed; best of 3 rounds."""
+    for _ in range(20):
+        fn()
+    best = float("inf")
+    for _ in range(3):
+        n = 0
+        t0 = time.perf_counter()
+        while True:
+            for _ in range(50):
+                fn()
+            n += 50
+            elapsed = time.perf_counter() - t0
+            if elapsed >= min_time_s / 3:
+                break
+        best = min(best, elapsed / n)
+    return best
+
+
+def _stages(ap: AudioProcessor, ms: int, rng: np.random.Generator) -> Dict[str, tuple]:
+    """name -> (fn, samples per frame, frames per call)."""
+    r = ap.rates
+    n_tel = r.telephony_sr * ms // 1000
+    n_out = r.gemini_output_sr * ms // 1000
+
+    tel = rng.integers(-12000, 12000, n_tel).astype(np.int16)
+    tel_list = tel.tolist()
+    gem_out = rng.integers(-12000, 12000, n_out).astype(np.int16)
+    gem_out_b64 = base64.b64encode(gem_out.tobytes()).decode("ascii")
+    up = ap.resample_int16(tel, r.telephony_sr, r.gemini_input_sr)
+    up_bytes = up.tobytes()
+    up_b64 = base64.b64encode(up_bytes).decode("ascii")
+    floats = tel.astype(np.float32) / 32768.0
+    ulaw = g711_encode(tel, "mulaw").tobytes()
+
+    up_stream = StreamingResampler(r.telephony_sr, r.gemini_input_sr)
+    down_stream = StreamingResampler(r.gemini_output_sr, r.telephony_sr, gain=0.90)
+    in_ap = AudioProcessor(r)
+    out_ap = AudioProcessor(r)
+
+    up_batch = np.stack([tel] * BATCH_STREAMS)
+    down_batch = np.stack([gem_out] * BATCH_STREAMS)
+    up_histories = np.stack([up_stream.state()[0]] * BATCH_STREAMS)
+    down_histories = np.stack([down_stream.state()[0]] * BATCH_STREAMS)
+
+    stages = {
+        "waybeo_samples_to_np": (lambda: ap.waybeo_samples_to_np(tel_list), n_tel),
+        "resample_int16 8k->16k (one-shot)": (
+            lambda: ap.resample_int16(tel, r.telephony_sr, r.gemini_input_sr),
+            n_tel,
+        ),
+        "resample_int16 24k->8k (one-shot)": (
+            lambda: ap.resample_int16(gem_out, r.gemini_output_sr, r.telephony_sr),
+            n_out,
+        ),
+        "streaming resample 8k->16k": (lambda: up_stream.process(tel), n_tel),
+        "streaming resample 24k->8k": (lambda: down_stream.process(gem_out), n_out),
+        "float32_to_int16": (lambda: ap.float32_to_int16(floats), n_tel),
+        "apply_fade": (lambda: ap.apply_fade(tel), n_tel),
+        "base64 encode (16k frame)": (lambda: base64.b64encode(up_bytes).decode("utf-8"), up.size),
+        "base64 decode (16k frame)": (lambda: base64.b64decode(up_b64), up.size),
+        "g711 mulaw encode": (lambda: g711_encode(tel, "mulaw"), n_tel),
+        "g711 mulaw decode": (lambda: g711_decode(ulaw, "mulaw"), n_tel),
+        "np_to_waybeo_samples": (lambda: ap.np_to_waybeo_samples(tel), n_tel),
+        "process_input_8k_to_gemini_16k_b64": (
+            lambda: in_ap.process_input_8k_to_gemini_16k_b64(tel),
+            n_tel,
+        ),
+        "process_output_gemini_b64_to_8k_np": (
+            lambda: out_ap.process_output_gemini_b64_to_8k_np(gem_out_b64),
+            n_out,
+        ),
+    }
+    out = {name: (fn, n, 1) for name, (fn, n) in stages.items()}
+    out[f"batched resample 8k->16k (x{BATCH_STREAMS})"] = (
+        lambda: resample_batch(up_stream, up_histories, 0, up_batch),
+        n_tel,
+        BATCH_STREAMS,
+    )
+    out[f"batched resample 24k->8k (x{BATCH_STREAMS})"] = (
+        lambda: resample_batch(down_stream, down_histories, 0, down_batch),
+        n_out,
+        BATCH_STREAMS,
+    )
+    return out
+
+
+def run(min_time_s: float) -> Dict[str, object]:
+    ap = AudioProcessor(AudioRates())
+    rng = np.random.default_rng(0)
+    results: List[Dict[str, object]] = []
+    for ms in FRAME_MS:
+        for name, (fn, n_samples, frames) in _stages(ap, ms, rng).items():
+            per_frame = _bench(fn, min_time_s) / frames
+            results.append(
+                {
+                    "stage": name,
+                    "frame_ms": ms,
+                    "samples": n_samples,
+                    "us_per_frame": round(per_frame * 1e6, 3),
+                    "ns_per_sample": round(per_frame * 1e9 / max(1, n_samples), 2),
+                    "frames_per_sec_core": round(1.0 / per_frame),
+                }
+            )
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def _print(report: Dict[str, object], baseline: Dict[str, object] = None) -> None:
+    base = {}
+    if baseline:
+        base = {(r["stage"], r["frame_ms"]): r for r in baseline["results"]}  # type: ignore[index]
+    header = f"{'stage':<38} {'frame':>6} {'us/frame':>10} {'ns/sample':>10} {'frames/s/core':>14}"
+    if base:
+        header += f" {'vs base':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in report["results"]:  # type: ignore[index]
+        line = (
+            f"{r['stage']:<38} {str(r['frame_ms']) + 'ms':>6} {r['us_per_frame']:>10.2f} "
+            f"{r['ns_per_sample']:>10.2f} {r['frames_per_sec_core']:>14,}"
+        )
+        old = base.get((r["stage"], r["frame_ms"]))
+        if old:
+            line += f" {old['us_per_frame'] / r['us_per_frame']:>8.2f}x"
+        print(line)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--min-time", type=float, default=0.3, help="seconds of timing per stage/frame size")
+    ap.add_argument("--json", default="", help="save results to this file")
+    ap.add_argument("--compare", default="", help="baseline JSON from an earlier run")
+    args = ap.parse_args()
+
+    report = run(args.min_time)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    _print(report, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
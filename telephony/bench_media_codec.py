@@ -0,0 +1,111 @@
+"""
+Benchmark: per-frame cost of Waybeo media frame decode/encode, before vs after `media_codec`.
+
+Run from the telephony folder:
+    python3 bench_media_codec.py [--ms 200] [--iters 2000]
+
+"before" is the original path (json.loads -> list -> np.array, dict -> json.dumps).
+"after" is `media_codec` with the active JSON backend, and with the stdlib fallback forced.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import media_codec
+
+
+def _time_per_call_us(fn, iters: int) -> float:
+    for _ in range(min(100, iters)):
+        fn()
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t0) / iters * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ms", type=int, default=200, help="frame size in ms at 8kHz")
+    ap.add_argument("--iters", type=int, default=2000)
+    args = ap.parse_args()
+
+    n = args.ms * 8
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-12000, 12000, n).astype(np.int16)
+    ucid = "18001234567-bench"
+    inbound = json.dumps(
+        {
+            "event": "media",
+            "type": "media",
+            "ucid": ucid,
+            "data": {
+                "samples": samples.tolist(),
+                "bitsPerSample": 16,
+                "sampleRate": 8000,
+                "channelCount": 1,
+                "numberOfFrames": n,
+                "type": "data",
+            },
+        }
+    )
+
+    def decode_before():
+        msg = json.loads(inbound)
+        return np.array(msg["data"].get("samples", []), dtype=np.int16)
+
+    def encode_before():
+        chunk = samples.tolist()
+        payload = {
+            "event": "media",
+            "type": "media",
+            "ucid": ucid,
+            "data": {
+                "samples": chunk,
+                "bitsPerSample": 16,
+                "sampleRate": 8000,
+                "channelCount": 1,
+                "numberOfFrames": len(chunk),
+                "type": "data",
+            },
+        }
+        return json.dumps(payload)
+
+    encoder = media_codec.MediaFrameEncoder(ucid, 8000)
+
+    def decode_after():
+        return media_codec.decode_frame(inbound)[1]
+
+    def encode_after():
+        return encoder.encode(samples)
+
+    # Sanity: the fast path must round-trip exactly.
+    assert np.array_equal(decode_after(), samples)
+    assert json.loads(encode_after()) == json.loads(encode_before())
+
+    rows = [
+        ("decode before (json + list)", _time_per_call_us(decode_before, args.iters)),
+        ("encode before (dict + json.dumps)", _time_per_call_us(encode_before, args.iters)),
+        (f"decode after ({media_codec.json_backend()})", _time_per_call_us(decode_after, args.iters)),
+        (f"encode after ({media_codec.json_backend()})", _time_per_call_us(encode_after, args.iters)),
+    ]
+    if media_codec._orjson is not None:
+        fast = media_codec._orjson
+        media_codec._orjson = None
+        try:
+            rows.append(("decode after (stdlib fallback)", _time_per_call_us(decode_after, args.iters)))
+            rows.append(("encode after (stdlib fallback)", _time_per_call_us(encode_after, args.iters)))
+        finally:
+            media_codec._orjson = fast
+
+    print(f"Waybeo media frame: {args.ms}ms @ 8kHz = {n} samples, {len(inbound)} bytes JSON")
+    for name, us in rows:
+        print(f"  {name:<36} {us:9.1f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
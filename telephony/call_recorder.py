@@ -0,0 +1,249 @@
+"""
+Call recording to stereo WAV (left = caller, right = agent), off the audio hot path.
+
+The event loop only copies each 8kHz frame into the call's queue (`CallRecording.caller()` /
+`.agent()`): a `deque` append, no locks, no disk. When a queue is full the frame is dropped and
+counted rather than ever blocking the loop.
+
+One writer thread per process drains every call's queues every `flush_s`, places each frame on the
+call's timeline by its arrival time (frames arriving back to back stay contiguous; real gaps become
+silence, so the two channels line up), and appends the aligned span to `<ucid>.wav` in one large
+write. The file is finalized (header patched) after the call ends, and the writer then logs
+`recording_finalized` with the final size. `summary()` is taken at hangup, before that: its
+`bytes_written_at_hangup` is whatever had been flushed by then.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+import wave
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from event_log import get_logger
+
+CALLER, AGENT = 0, 1
+
+LOG = get_logger("recorder")
+
+
+@dataclass
+class RecordingStats:
+    frames: int = 0
+    dropped_frames: int = 0
+    queue_high_water: int = 0
+    bytes_written: int = 0
+
+
+class CallRecording:
+    def __init__(self, recorder: "CallRecorder", ucid: str, max_queue_frames: int):
+        self.ucid = ucid
+        self.sample_rate = recorder.sample_rate
+        self.started_at = time.monotonic()
+        self.max_queue_frames = max_queue_frames
+        self.stats = RecordingStats()
+        self.closed = False
+        self.path: Optional[str] = None
+        # (channel, arrival position in samples, samples); appended on the loop, popped by the writer
+        self._queue: Deque[Tuple[int, int, np.ndarray]] = deque()
+        self._recorder = recorder
+
+    # ---- event loop side ----
+    def _put(self, channel: int, samples: np.ndarray) -> None:
+        if self.closed or not samples.size:
+            return
+        depth = len(self._queue)
+        if depth >= self.max_queue_frames:
+            self.stats.dropped_frames += 1
+            return
+        pos = int((time.monotonic() - self.started_at) * self.sample_rate)
+        # Copy: inbound/outbound frames are often views into ring buffers that get reused.
+        self._queue.append((channel, pos, np.array(samples, dtype=np.int16)))
+        self.stats.frames += 1
+        if depth + 1 > self.stats.queue_high_water:
+            self.stats.queue_high_water = depth + 1
+
+    def caller(self, samples: np.ndarray) -> None:
+        """Inbound frame (arrival time = end of the frame)."""
+        self._put(CALLER, samples)
+
+    def agent(self, samples: np.ndarray) -> None:
+        """Outbound frame (send time = start of playback)."""
+        self._put(AGENT, samples)
+
+    def close(self) -> None:
+        self.closed = True
+        self._recorder.wake()
+
+    def summary(self) -> Dict[str, Any]:
+        """Stats at hangup; the file is still being finalized (see `recording_finalized`)."""
+        st = self.stats
+        return {
+            "frames": st.frames,
+            "dropped_frames": st.dropped_frames,
+            "queue_high_water": st.queue_high_water,
+            "bytes_written_at_hangup": st.bytes_written,
+        }
+
+
+class _Timeline:
+    """Writer-thread state for one recording: pending stereo samples not yet written to disk."""
+
+    def __init__(self, rec: CallRecording, wav: wave.Wave_write, jitter_samples: int):
+        self.rec = rec
+        self.wav = wav
+        self.jitter = jitter_samples
+        self.written = 0  # timeline position of pending[0]
+        self.cursor = [0, 0]  # per channel: end of the last placed frame
+        self.pending = np.zeros((0, 2), dtype=np.int16)
+
+    def place(self, channel: int, pos: int, samples: np.ndarray) -> None:
+        n = samples.size
+        start = pos - n if channel == CALLER else pos
+        cur = self.cursor[channel]
+        if abs(start - cur) <= self.jitter or start < cur:
+            start = cur  # back to back (network jitter) or late: keep the channel contiguous
+        start = max(start, self.written)
+        end = start + n
+        need = end - self.written
+        if need > len(self.pending):
+            grown = np.zeros((max(need, 2 * len(self.pending)), 2), dtype=np.int16)
+            grown[: len(self.pending)] = self.pending
+            self.pending = grown
+        self.pending[start - self.written : end - self.written, channel] = samples
+        self.cursor[channel] = end
+
+    def flush(self, upto: int) -> int:
+        """Write the timeline up to position `upto` (silence where nothing arrived)."""
+        n = upto - self.written
+        if n <= 0:
+            return 0
+        if n > len(self.pending):
+            grown = np.zeros((n, 2), dtype=np.int16)
+            grown[: len(self.pending)] = self.pending
+            self.pending = grown
+        data = self.pending[:n].astype("<i2").tobytes()
+        self.wav.writeframesraw(data)
+        self.pending = self.pending[n:].copy()
+        self.written = upto
+        return len(data)
+
+
+class CallRecorder:
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: int = 8000,
+        max_queue_frames: int = 500,
+        flush_s: float = 1.0,
+        jitter_ms: int = 60,
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_queue_frames = max_queue_frames
+        self.flush_s = flush_s
+        self.jitter_samples = sample_rate * jitter_ms // 1000
+        self.errors = 0
+
+        self._new: Deque[CallRecording] = deque()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="call-recorder", daemon=True)
+        self._thread.start()
+
+    def open(self, ucid: str) -> CallRecording:
+        rec = CallRecording(self, ucid, self.max_queue_frames)
+        self._new.append(rec)
+        return rec
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout_s: float = 10.0) -> None:
+        """Flush and finalize every recording, then stop the writer thread."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout_s)
+
+    # ---- writer thread ----
+    def _path_for(self, ucid: str) -> str:
+        safe = re.sub(r"[^A-Za-z0-9._-]", "_", ucid) or "UNKNOWN"
+        path = os.path.join(self.directory, f"{safe}.wav")
+        n = 1
+        while os.path.exists(path):
+            path = os.path.join(self.directory, f"{safe}-{n}.wav")
+            n += 1
+        return path
+
+    def _open_wav(self, rec: CallRecording) -> Optional[_Timeline]:
+        try:
+            rec.path = self._path_for(rec.ucid)
+            wav = wave.open(rec.path, "wb")
+            wav.setnchannels(2)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+        except Exception as e:
+            self.errors += 1
+            LOG.error("recording_open_failed", ucid=rec.ucid, error=str(e))
+            return None
+        return _Timeline(rec, wav, self.jitter_samples)
+
+    def _run(self) -> None:
+        active: List[_Timeline] = []
+        # Frames newer than this are left pending: the other channel may still deliver older audio.
+        hold_back = int(self.flush_s * self.sample_rate)
+        while True:
+            self._wake.wait(self.flush_s)
+            self._wake.clear()
+            stopping = self._stopping
+
+            while self._new:
+                timeline = self._open_wav(self._new.popleft())
+                if timeline is not None:
+                    active.append(timeline)
+
+            still: List[_Timeline] = []
+            for tl in active:
+                rec = tl.rec
+                done = rec.closed or stopping
+                try:
+                    while rec._queue:
+                        tl.place(*rec._queue.popleft())
+                    now_pos = int((time.monotonic() - rec.started_at) * rec.sample_rate)
+                    upto = max(tl.cursor) if done else now_pos - hold_back
+                    rec.stats.bytes_written += tl.flush(upto)
+                    if done:
+                        tl.wav.close()
+                        LOG.info(
+                            "recording_finalized",
+                            ucid=rec.ucid,
+                            path=rec.path,
+                            bytes_written=rec.stats.bytes_written,
+                            seconds=round(tl.written / rec.sample_rate, 2),
+                            dropped_frames=rec.stats.dropped_frames,
+                        )
+                except Exception as e:
+                    self.errors += 1
+                    done = True
+                    LOG.error("recording_write_failed", ucid=rec.ucid, error=str(e))
+                    try:
+                        tl.wav.close()
+                    except Exception:
+                        pass
+                if not done:
+                    still.append(tl)
+            active = still
+
+            if stopping and not self._new:
+                return
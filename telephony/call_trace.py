@@ -0,0 +1,183 @@
+"""
+Per-call, per-turn latency tracing.
+
+`CallTrace` timestamps the key points of every conversational turn:
+- caller speech onset (first voiced inbound frame after silence) and last voiced frame (end of speech)
+- first upstream send to Gemini after the onset
+- first `modelTurn` audio part from Gemini
+- first outbound audio frame to Waybeo
+- `interrupted` (barge-in) events
+
+At hangup `summary()` condenses this into one compact dict (p50/p95 per measure) that
+`TraceWriter` appends as a JSON line to a size-rotated file, keyed by `ucid`. The event loop only
+queues the dict; JSON encoding, the file write and rollover happen on the writer's own thread. The breakdown shows
+whether the uplink buffering (`AUDIO_BUFFER_MS_INPUT`), the network or the model eats the budget.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from event_log import NonBlockingQueueHandler
+
+
+def _pct(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"n": 0, "p50": None, "p95": None}
+    arr = np.asarray(values, dtype=np.float64) * 1000.0
+    return {
+        "n": len(values),
+        "p50": round(float(np.percentile(arr, 50)), 1),
+        "p95": round(float(np.percentile(arr, 95)), 1),
+    }
+
+
+class CallTrace:
+    def __init__(self, ucid: str, silence_gap_s: float = 0.3):
+        self.ucid = ucid
+        # Unvoiced time after which the next voiced frame counts as a new utterance.
+        self.silence_gap_s = silence_gap_s
+        self.started_at = time.monotonic()
+
+        self.speech_onset_at = 0.0
+        self.last_voice_at = 0.0
+        self._awaiting_upstream = False
+        self._model_audio_at = 0.0  # first model audio of the current turn (0 = turn not started)
+        self._eos_at_model_audio = 0.0
+        self._turn_outbound_sent = False
+        self.first_outbound_at = 0.0
+
+        self.upstream_delay: List[float] = []  # speech onset -> first upstream send
+        self.model_latency: List[float] = []  # end of speech -> first model audio
+        self.egress_delay: List[float] = []  # first model audio -> first outbound frame
+        self.turn_latency: List[float] = []  # end of speech -> first outbound frame
+        self.barge_in_reaction: List[float] = []  # speech onset -> interrupted
+        self.interruptions = 0
+
+    # ---- caller side ----
+    def on_inbound_frame(self, voiced: bool, now: Optional[float] = None) -> None:
+        if not voiced:
+            return
+        now = time.monotonic() if now is None else now
+        if not self.last_voice_at or now - self.last_voice_at > self.silence_gap_s:
+            self.speech_onset_at = now
+            self._awaiting_upstream = True
+        self.last_voice_at = now
+
+    def on_upstream_send(self, now: Optional[float] = None) -> None:
+        if self._awaiting_upstream:
+            now = time.monotonic() if now is None else now
+            self.upstream_delay.append(now - self.speech_onset_at)
+            self._awaiting_upstream = False
+
+    # ---- model side ----
+    def on_model_audio(self, now: Optional[float] = None) -> None:
+        if self._model_audio_at:
+            return
+        now = time.monotonic() if now is None else now
+        self._model_audio_at = now
+        self._turn_outbound_sent = False
+        self._eos_at_model_audio = self.last_voice_at
+        if self.last_voice_at:
+            self.model_latency.append(now - self.last_voice_at)
+
+    def on_outbound_frame(self, now: Optional[float] = None) -> Optional[float]:
+        """Returns the turn latency (seconds) on the first outbound frame of a turn, else None."""
+        if self._turn_outbound_sent:
+            return None
+        now = time.monotonic() if now is None else now
+        self._turn_outbound_sent = True
+        if not self.first_outbound_at:
+            self.first_outbound_at = now
+        if self._model_audio_at:
+            self.egress_delay.append(now - self._model_audio_at)
+        if self._eos_at_model_audio:
+            latency = now - self._eos_at_model_audio
+            self.turn_latency.append(latency)
+            return latency
+        return None
+
+    def on_turn_end(self) -> None:
+        self._model_audio_at = 0.0
+        self._eos_at_model_audio = 0.0
+
+    def on_interrupted(self, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.interruptions += 1
+        if self.speech_onset_at:
+            self.barge_in_reaction.append(now - self.speech_onset_at)
+        self.on_turn_end()
+
+    def summary(self, **extra: Any) -> Dict[str, Any]:
+        ended = time.monotonic()
+        out: Dict[str, Any] = {
+            "ucid": self.ucid,
+            "ts": round(time.time(), 3),
+            "duration_s": round(ended - self.started_at, 2),
+            "time_to_first_audio_ms": (
+                round((self.first_outbound_at - self.started_at) * 1000.0, 1)
+                if self.first_outbound_at
+                else None
+            ),
+            "turns": len(self.turn_latency),
+            "interruptions": self.interruptions,
+            "turn_latency_ms": _pct(self.turn_latency),
+            "model_latency_ms": _pct(self.model_latency),
+            "upstream_delay_ms": _pct(self.upstream_delay),
+            "egress_delay_ms": _pct(self.egress_delay),
+            "barge_in_reaction_ms": _pct(self.barge_in_reaction),
+        }
+        out.update(extra)
+        return out
+
+
+class _JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, separators=(",", ":"), default=str)
+
+
+class TraceWriter:
+    """Appends one JSON line per call to a size-rotated file, from a background thread."""
+
+    def __init__(
+        self, path: str, max_bytes: int = 10 * 1024 * 1024, backups: int = 5, queue_max: int = 10000
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        file_handler.setFormatter(_JsonLineFormatter())
+
+        self._logger = logging.getLogger(f"telephony.call_trace.{path}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        for old in list(self._logger.handlers):
+            self._logger.removeHandler(old)
+        self._handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_max))
+        self._logger.addHandler(self._handler)
+        self._listener = logging.handlers.QueueListener(self._handler.queue, file_handler)
+        self._listener.start()
+
+    @property
+    def dropped(self) -> int:
+        """Trace lines dropped because the writer thread fell behind."""
+        return self._handler.dropped
+
+    def write(self, summary: Dict[str, Any]) -> None:
+        # The dict is encoded on the writer thread; it must not be mutated afterwards.
+        self._logger.info(summary)
+
+    def close(self) -> None:
+        """Write out every queued line and stop the writer thread."""
+        self._listener.stop()
+        self._listener.handlers[0].close()
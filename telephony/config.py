@@ -13,6 +13,8 @@ from dataclasses import dataclass
 
 from dotenv import load_dotenv
 
+from event_log import LEVELS, parse_event_rates
+
 # Load .env if present (optional)
 load_dotenv()
 
@@ -33,6 +35,26 @@ class Config:
 
     DEBUG: bool = _env_bool("DEBUG", False)
 
+    # Structured JSON logs written by a background thread (see event_log); DEBUG=true implies debug level.
+    # Each event type is limited to LOG_RATE_PER_EVENT records/s, overridable via "event=rate,..." (0 = no limit).
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "debug" if _env_bool("DEBUG", False) else "info").lower()
+    LOG_RATE_PER_EVENT: float = float(os.getenv("LOG_RATE_PER_EVENT", "20"))
+    LOG_EVENT_RATES: str = os.getenv("LOG_EVENT_RATES", "")
+    LOG_MAX_FIELD_CHARS: int = int(os.getenv("LOG_MAX_FIELD_CHARS", "512"))
+    LOG_QUEUE_MAX: int = int(os.getenv("LOG_QUEUE_MAX", "10000"))
+
+    # Prometheus /metrics HTTP port (0 = disabled); worker N uses METRICS_PORT + N
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
+    # Per-call JSONL latency summaries (empty = disabled); rotated by size
+    CALL_TRACE_FILE: str = os.getenv("CALL_TRACE_FILE", "")
+    CALL_TRACE_MAX_BYTES: int = int(os.getenv("CALL_TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+    CALL_TRACE_BACKUPS: int = int(os.getenv("CALL_TRACE_BACKUPS", "5"))
+
+    # Worker processes sharing PORT via SO_REUSEPORT (1 = single process, no supervisor)
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    WORKER_STATS_INTERVAL_S: float = float(os.getenv("WORKER_STATS_INTERVAL_S", "60"))
+
     # GCP / Gemini
     GCP_PROJECT_ID: str = os.getenv("GCP_PROJECT_ID", "")
     GEMINI_LOCATION: str = os.getenv("GEMINI_LOCATION", "us-central1")
@@ -40,6 +62,32 @@ class Config:
         "GEMINI_MODEL", "gemini-live-2.5-flash-native-audio"
     )
     GEMINI_VOICE: str = os.getenv("GEMINI_VOICE", "Aoede")
+    GEMINI_SERVICE_URL: str = os.getenv(
+        "GEMINI_SERVICE_URL",
+        "wss://us-central1-aiplatform.googleapis.com/ws/"
+        "google.cloud.aiplatform.v1beta1.LlmBidiService/BidiGenerateContent",
+    )
+    # Fixed bearer token instead of Google default credentials (local stand-in / load tests only)
+    GEMINI_ACCESS_TOKEN: str = os.getenv("GEMINI_ACCESS_TOKEN", "")
+
+    # Reconnect a dropped Gemini websocket mid-call (0 attempts = drop ends the audio), resuming the
+    # server session via its resumption handle; caller audio is buffered meanwhile and replayed
+    GEMINI_RECONNECT_ATTEMPTS: int = int(os.getenv("GEMINI_RECONNECT_ATTEMPTS", "5"))
+    GEMINI_SESSION_RESUMPTION: bool = _env_bool("GEMINI_SESSION_RESUMPTION", True)
+    GEMINI_RECONNECT_BUFFER_MS: int = int(os.getenv("GEMINI_RECONNECT_BUFFER_MS", "5000"))
+
+    # Admission control per worker: refuse new calls (close code ADMISSION_REJECT_CODE, retryable) above
+    # MAX_CONCURRENT_CALLS or ADMISSION_MAX_LOOP_LAG_MS of event-loop lag (0 = no limit). On SIGTERM stop
+    # accepting calls and give in-flight calls up to DRAIN_TIMEOUT_S to finish before exiting.
+    MAX_CONCURRENT_CALLS: int = int(os.getenv("MAX_CONCURRENT_CALLS", "0"))
+    ADMISSION_MAX_LOOP_LAG_MS: float = float(os.getenv("ADMISSION_MAX_LOOP_LAG_MS", "0"))
+    ADMISSION_REJECT_CODE: int = int(os.getenv("ADMISSION_REJECT_CODE", "1013"))
+    DRAIN_TIMEOUT_S: float = float(os.getenv("DRAIN_TIMEOUT_S", "120"))
+
+    # Pre-warmed (connected + setupComplete) Gemini sessions per worker; 0 disables the pool
+    GEMINI_POOL_SIZE: int = int(os.getenv("GEMINI_POOL_SIZE", "0"))
+    GEMINI_POOL_IDLE_TTL_S: float = float(os.getenv("GEMINI_POOL_IDLE_TTL_S", "120"))
+    GEMINI_POOL_HEALTH_INTERVAL_S: float = float(os.getenv("GEMINI_POOL_HEALTH_INTERVAL_S", "15"))
 
     # Audio
     TELEPHONY_SR: int = int(os.getenv("TELEPHONY_SR", "8000"))  # Waybeo input/output
@@ -50,6 +98,59 @@ class Config:
     AUDIO_BUFFER_MS_INPUT: int = int(os.getenv("AUDIO_BUFFER_MS_INPUT", "200"))
     AUDIO_BUFFER_MS_OUTPUT: int = int(os.getenv("AUDIO_BUFFER_MS_OUTPUT", "200"))
 
+    # Inbound frames with RMS above this (and zero-crossing rate below SPEECH_ZCR_MAX) count as caller speech
+    SPEECH_RMS_THRESHOLD: float = float(os.getenv("SPEECH_RMS_THRESHOLD", "500"))
+    SPEECH_ZCR_MAX: float = float(os.getenv("SPEECH_ZCR_MAX", "0.35"))
+
+    # Adaptive uplink chunking: UPLINK_ACTIVE_FRAME_MS chunks while the caller speaks (and for
+    # UPLINK_HANGOVER_MS after), AUDIO_BUFFER_MS_INPUT chunks during steady silence
+    UPLINK_ADAPTIVE: bool = _env_bool("UPLINK_ADAPTIVE", True)
+    UPLINK_ACTIVE_FRAME_MS: int = int(os.getenv("UPLINK_ACTIVE_FRAME_MS", "40"))
+    UPLINK_HANGOVER_MS: int = int(os.getenv("UPLINK_HANGOVER_MS", "400"))
+
+    # Drop uplink audio after UPLINK_HANGOVER_MS of silence; keep UPLINK_PREROLL_MS for the next onset
+    # and forward one real frame every UPLINK_KEEPALIVE_MS while suppressed
+    UPLINK_SILENCE_SUPPRESSION: bool = _env_bool("UPLINK_SILENCE_SUPPRESSION", False)
+    UPLINK_PREROLL_MS: int = int(os.getenv("UPLINK_PREROLL_MS", "300"))
+    UPLINK_KEEPALIVE_MS: int = int(os.getenv("UPLINK_KEEPALIVE_MS", "1000"))
+
+    # Paced playout to telephony: fixed frames on a real-time clock, at most LEAD ms in flight.
+    # With PLAYOUT_PACED=false, audio is sent in AUDIO_BUFFER_MS_OUTPUT chunks as fast as it arrives.
+    PLAYOUT_PACED: bool = _env_bool("PLAYOUT_PACED", True)
+    PLAYOUT_FRAME_MS: int = int(os.getenv("PLAYOUT_FRAME_MS", "20"))
+    PLAYOUT_LEAD_MS: int = int(os.getenv("PLAYOUT_LEAD_MS", "60"))
+
+    # Per-call send queues (audio items): beyond this, items are dropped per policy (drop_oldest / drop_newest)
+    UPLINK_QUEUE_MAX: int = int(os.getenv("UPLINK_QUEUE_MAX", "50"))
+    UPLINK_QUEUE_POLICY: str = os.getenv("UPLINK_QUEUE_POLICY", "drop_oldest")
+    DOWNLINK_QUEUE_MAX: int = int(os.getenv("DOWNLINK_QUEUE_MAX", "50"))
+    DOWNLINK_QUEUE_POLICY: str = os.getenv("DOWNLINK_QUEUE_POLICY", "drop_oldest")
+
+    # Stereo WAV recordings (left = caller, right = agent) written off the event loop; "" disables.
+    # Frames beyond RECORDING_QUEUE_MAX_FRAMES queued per call are dropped (counted), never waited on.
+    RECORDING_DIR: str = os.getenv("RECORDING_DIR", "")
+    RECORDING_QUEUE_MAX_FRAMES: int = int(os.getenv("RECORDING_QUEUE_MAX_FRAMES", "500"))
+    RECORDING_FLUSH_S: float = float(os.getenv("RECORDING_FLUSH_S", "1.0"))
+
+    # Gemini input/output transcription, coalesced per turn and written in batches to a local SQLite
+    # database (every TRANSCRIPT_FLUSH_ROWS rows or TRANSCRIPT_FLUSH_MS, whichever comes first).
+    TRANSCRIPTION_ENABLED: bool = _env_bool("TRANSCRIPTION_ENABLED", False)
+    TRANSCRIPT_DB: str = os.getenv("TRANSCRIPT_DB", "transcripts.db")
+    TRANSCRIPT_FLUSH_ROWS: int = int(os.getenv("TRANSCRIPT_FLUSH_ROWS", "50"))
+    TRANSCRIPT_FLUSH_MS: int = int(os.getenv("TRANSCRIPT_FLUSH_MS", "500"))
+    TRANSCRIPT_MAX_PENDING: int = int(os.getenv("TRANSCRIPT_MAX_PENDING", "10000"))
+
+    # Batched audio engine: resample every call's pending audio together once per tick (0 = off, each
+    # call resamples its own chunks). Adds up to one tick of latency per direction.
+    AUDIO_ENGINE_TICK_MS: int = int(os.getenv("AUDIO_ENGINE_TICK_MS", "0"))
+    AUDIO_ENGINE_THREAD: bool = _env_bool("AUDIO_ENGINE_THREAD", False)
+
+    # Ring buffer capacity per call (ms of 8kHz audio); oldest audio is dropped beyond this
+    AUDIO_RING_MS_INPUT: int = int(os.getenv("AUDIO_RING_MS_INPUT", "2000"))
+    AUDIO_RING_MS_OUTPUT: int = int(os.getenv("AUDIO_RING_MS_OUTPUT", "10000"))
+    # Paced playout holds whole model turns: the output ring grows up to this instead of dropping audio
+    PLAYOUT_MAX_BUFFER_MS: int = int(os.getenv("PLAYOUT_MAX_BUFFER_MS", "300000"))
+
     @property
     def AUDIO_BUFFER_SAMPLES_INPUT(self) -> int:
         return int((self.AUDIO_BUFFER_MS_INPUT / 1000.0) * self.TELEPHONY_SR)
@@ -58,6 +159,28 @@ class Config:
     def AUDIO_BUFFER_SAMPLES_OUTPUT(self) -> int:
         return int((self.AUDIO_BUFFER_MS_OUTPUT / 1000.0) * self.TELEPHONY_SR)
 
+    @property
+    def UPLINK_ACTIVE_FRAME_SAMPLES(self) -> int:
+        return int((self.UPLINK_ACTIVE_FRAME_MS / 1000.0) * self.TELEPHONY_SR)
+
+    @property
+    def AUDIO_RING_SAMPLES_INPUT(self) -> int:
+        return max(
+            int((self.AUDIO_RING_MS_INPUT / 1000.0) * self.TELEPHONY_SR),
+            2 * self.AUDIO_BUFFER_SAMPLES_INPUT,
+        )
+
+    @property
+    def AUDIO_RING_SAMPLES_OUTPUT(self) -> int:
+        return max(
+            int((self.AUDIO_RING_MS_OUTPUT / 1000.0) * self.TELEPHONY_SR),
+            2 * self.AUDIO_BUFFER_SAMPLES_OUTPUT,
+        )
+
+    @property
+    def PLAYOUT_MAX_BUFFER_SAMPLES(self) -> int:
+        return int((self.PLAYOUT_MAX_BUFFER_MS / 1000.0) * self.TELEPHONY_SR)
+
     @property
     def model_uri(self) -> str:
         return (
@@ -70,6 +193,29 @@ class Config:
         if not cfg.GCP_PROJECT_ID:
             raise ValueError("GCP_PROJECT_ID is required (e.g. voiceagentprojects)")
 
+        if cfg.WORKERS < 1:
+            raise ValueError("WORKERS must be >= 1")
+
+        for policy in (cfg.UPLINK_QUEUE_POLICY, cfg.DOWNLINK_QUEUE_POLICY):
+            if policy not in {"drop_oldest", "drop_newest"}:
+                raise ValueError("*_QUEUE_POLICY must be 'drop_oldest' or 'drop_newest'")
+
+        if cfg.UPLINK_ACTIVE_FRAME_MS <= 0 or cfg.UPLINK_ACTIVE_FRAME_MS > cfg.AUDIO_BUFFER_MS_INPUT:
+            raise ValueError("UPLINK_ACTIVE_FRAME_MS must be in (0, AUDIO_BUFFER_MS_INPUT]")
+
+        if cfg.RECORDING_DIR and (cfg.RECORDING_QUEUE_MAX_FRAMES < 1 or cfg.RECORDING_FLUSH_S <= 0):
+            raise ValueError("RECORDING_QUEUE_MAX_FRAMES must be >= 1 and RECORDING_FLUSH_S > 0")
+
+        if cfg.TRANSCRIPTION_ENABLED and (cfg.TRANSCRIPT_FLUSH_ROWS < 1 or cfg.TRANSCRIPT_FLUSH_MS <= 0):
+            raise ValueError("TRANSCRIPT_FLUSH_ROWS must be >= 1 and TRANSCRIPT_FLUSH_MS > 0")
+
+        if cfg.LOG_LEVEL not in LEVELS:
+            raise ValueError(f"LOG_LEVEL must be one of {', '.join(LEVELS)}")
+        parse_event_rates(cfg.LOG_EVENT_RATES)
+
+        if cfg.AUDIO_ENGINE_TICK_MS < 0:
+            raise ValueError("AUDIO_ENGINE_TICK_MS must be >= 0")
+
         if not cfg.WS_PATH.startswith("/"):
             raise ValueError("WS_PATH must start with '/' (e.g. /ws or /wsNew1)")
 
@@ -92,7 +238,56 @@ class Config:
             f"out={self.AUDIO_BUFFER_MS_OUTPUT}ms "
             f"({self.AUDIO_BUFFER_SAMPLES_OUTPUT} samples)"
         )
+        if self.UPLINK_ADAPTIVE:
+            print(
+                f"🎚️  Uplink: adaptive, {self.UPLINK_ACTIVE_FRAME_MS}ms while speaking "
+                f"(hangover {self.UPLINK_HANGOVER_MS}ms), {self.AUDIO_BUFFER_MS_INPUT}ms in silence"
+            )
+        else:
+            print(f"🎚️  Uplink: fixed {self.AUDIO_BUFFER_MS_INPUT}ms chunks")
+        if self.UPLINK_SILENCE_SUPPRESSION:
+            print(
+                f"🔇 Uplink silence suppression: pre-roll={self.UPLINK_PREROLL_MS}ms, "
+                f"keep-alive every {self.UPLINK_KEEPALIVE_MS}ms"
+            )
+        print(
+            f"🔥 Gemini session pool: size={self.GEMINI_POOL_SIZE}, "
+            f"idle_ttl={self.GEMINI_POOL_IDLE_TTL_S}s"
+        )
+        if self.AUDIO_ENGINE_TICK_MS > 0:
+            print(
+                f"🧮 Audio engine: batched every {self.AUDIO_ENGINE_TICK_MS}ms"
+                f"{' on a worker thread' if self.AUDIO_ENGINE_THREAD else ''}"
+            )
+        print(f"👷 Workers: {self.WORKERS}")
+        print(
+            f"🚦 Admission: max_calls={self.MAX_CONCURRENT_CALLS or 'unlimited'}, "
+            f"max_loop_lag={self.ADMISSION_MAX_LOOP_LAG_MS or 'off'}ms, drain_timeout={self.DRAIN_TIMEOUT_S}s"
+        )
+        print(f"📈 Metrics port: {self.METRICS_PORT or 'disabled'}")
+        if self.TRANSCRIPTION_ENABLED:
+            print(
+                f"📝 Transcripts: {self.TRANSCRIPT_DB} (flush every {self.TRANSCRIPT_FLUSH_ROWS} rows "
+                f"or {self.TRANSCRIPT_FLUSH_MS}ms)"
+            )
+        if self.RECORDING_DIR:
+            print(
+                f"💾 Recording: {self.RECORDING_DIR} (queue={self.RECORDING_QUEUE_MAX_FRAMES} frames/call, "
+                f"flush every {self.RECORDING_FLUSH_S}s)"
+            )
+        if self.PLAYOUT_PACED:
+            print(
+                f"⏱️  Playout: paced, frame={self.PLAYOUT_FRAME_MS}ms, lead={self.PLAYOUT_LEAD_MS}ms, "
+                f"buffer up to {self.PLAYOUT_MAX_BUFFER_MS}ms"
+            )
+        else:
+            print("⏱️  Playout: unpaced (burst)")
         print(f"🐞 DEBUG: {self.DEBUG}")
+        print(
+            f"🪵 Logs: level={self.LOG_LEVEL}, {self.LOG_RATE_PER_EVENT:g}/s per event"
+            f"{', ' + self.LOG_EVENT_RATES if self.LOG_EVENT_RATES else ''}, "
+            f"fields cut at {self.LOG_MAX_FIELD_CHARS} chars"
+        )
         print("=" * 68)
 
 
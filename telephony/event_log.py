@@ -0,0 +1,229 @@
+"""
+Structured JSON logging that keeps formatting and I/O off the event loop.
+
+`get_logger(name).bind(ucid=...)` returns an `EventLogger`; `log.info("gemini_interrupted", dropped_ms=40)`
+costs the caller a level check, a rate-limit check and a queue put. A `QueueListener` thread does the
+JSON encoding and the stdout write, one line per event:
+
+    {"ts":"2026-01-01T10:00:00.123Z","level":"info","logger":"telephony","event":"gemini_interrupted",
+     "ucid":"abc","dropped_ms":40}
+
+- rate limiting: each event type gets `LOG_RATE_PER_EVENT` records per second (token bucket, burst of
+  one second's worth; `LOG_EVENT_RATES="event=rate,..."` overrides per event, 0 = unlimited). Records
+  over the limit are counted and the next one that goes through carries `"suppressed": n`
+- truncation: string values longer than `LOG_MAX_FIELD_CHARS` (nested ones too) are cut on the writer
+  thread, so a stray base64 payload can't produce megabyte log lines
+- the queue is bounded (`LOG_QUEUE_MAX`); if the writer can't keep up, records are dropped rather
+  than blocking the caller
+
+The module has no imports from this repo; the browser proxy (`server.py`) uses it as
+`telephony.event_log` with its own logger root and the same `LOG_*` settings.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional
+
+LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+}
+
+
+class EventRateLimiter:
+    def __init__(self, default_rate: float = 20.0, rates: Optional[Mapping[str, float]] = None):
+        self.default_rate = default_rate
+        self.rates = dict(rates or {})
+        # event -> [tokens, last refill (monotonic), suppressed since the last emitted record]
+        self._buckets: Dict[str, list] = {}
+
+    def allow(self, event: str) -> Optional[int]:
+        """None if the record should be dropped, else the number suppressed since the last one."""
+        rate = self.rates.get(event, self.default_rate)
+        if rate <= 0:
+            return 0
+        now = time.monotonic()
+        bucket = self._buckets.get(event)
+        if bucket is None:
+            bucket = self._buckets[event] = [rate, now, 0]
+        else:
+            bucket[0] = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] < 1.0:
+            bucket[2] += 1
+            return None
+        bucket[0] -= 1.0
+        suppressed, bucket[2] = bucket[2], 0
+        return suppressed
+
+
+def parse_event_rates(spec: str) -> Dict[str, float]:
+    """"gemini_reconnect=2,proxy_message=5" -> {"gemini_reconnect": 2.0, "proxy_message": 5.0}"""
+    rates: Dict[str, float] = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        event, sep, rate = item.partition("=")
+        if not sep:
+            raise ValueError(f"LOG_EVENT_RATES entry {item!r} is not event=rate")
+        rates[event.strip()] = float(rate)
+    return rates
+
+
+def _truncate(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str):
+        if len(value) > max_chars:
+            return f"{value[:max_chars]}...(+{len(value) - max_chars} chars)"
+        return value
+    if isinstance(value, dict):
+        return {k: _truncate(v, max_chars) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_truncate(v, max_chars) for v in value]
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, max_field_chars: int = 512):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")[:-6] + "Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            for key, value in fields.items():
+                out[key] = _truncate(value, self.max_field_chars)
+        if record.exc_info:
+            out["exc"] = _truncate(self.formatException(record.exc_info), self.max_field_chars * 8)
+        return json.dumps(out, separators=(",", ":"), default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler for a `QueueListener`: never formats or blocks on the caller's thread."""
+
+    def __init__(self, q: "queue.Queue[logging.LogRecord]"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock handler formats here, i.e. on the caller's thread; leave that to the listener.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class EventLogger:
+    def __init__(self, logger: logging.Logger, limiter: EventRateLimiter, context: Optional[Dict[str, Any]] = None):
+        self._logger = logger
+        self._limiter = limiter
+        self.context = context or {}
+
+    def bind(self, **context: Any) -> "EventLogger":
+        """Child logger whose records all carry `context` (e.g. ucid)."""
+        return EventLogger(self._logger, self._limiter, {**self.context, **context})
+
+    def enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _emit(self, level: int, event: str, fields: Dict[str, Any], exc_info: Any = None) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        suppressed = self._limiter.allow(event)
+        if suppressed is None:
+            return
+        merged = {**self.context, **fields} if self.context else fields
+        if suppressed:
+            merged["suppressed"] = suppressed
+        # makeRecord + handle skips Logger.log's stack walk (findCaller).
+        record = self._logger.makeRecord(
+            self._logger.name, level, "", 0, event, None, exc_info, extra={"fields": merged}
+        )
+        self._logger.handle(record)
+
+    def debug(self, event: str, **fields: Any) -> None:
+        self._emit(logging.DEBUG, event, fields)
+
+    def info(self, event: str, **fields: Any) -> None:
+        self._emit(logging.INFO, event, fields)
+
+    def warning(self, event: str, **fields: Any) -> None:
+        self._emit(logging.WARNING, event, fields)
+
+    def error(self, event: str, exc_info: Any = None, **fields: Any) -> None:
+        if exc_info is True:
+            exc_info = sys.exc_info()
+        self._emit(logging.ERROR, event, fields, exc_info)
+
+
+_ROOT = "telephony"
+_LIMITER = EventRateLimiter()
+_LISTENER: Optional[logging.handlers.QueueListener] = None
+_HANDLER: Optional[NonBlockingQueueHandler] = None
+_PID: Optional[int] = None
+
+
+def configure_logging(
+    level: str = "info",
+    rate_per_event: float = 20.0,
+    event_rates: Optional[Mapping[str, float]] = None,
+    max_field_chars: int = 512,
+    queue_max: int = 10000,
+    stream: Any = None,
+    root_name: str = _ROOT,
+) -> None:
+    """Install the queue handler + writer thread (once per process; workers call it after fork)."""
+    global _LISTENER, _HANDLER, _PID
+    if _PID == os.getpid():
+        return
+    _PID = os.getpid()
+    _LIMITER.default_rate = rate_per_event
+    _LIMITER.rates = dict(event_rates or {})
+
+    root = logging.getLogger(root_name)
+    root.setLevel(LEVELS.get(level.lower(), logging.INFO))
+    root.propagate = False
+    for handler in list(root.handlers):  # inherited from the parent process
+        root.removeHandler(handler)
+
+    out = logging.StreamHandler(stream or sys.stdout)
+    out.setFormatter(JsonFormatter(max_field_chars))
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_max)
+    _HANDLER = NonBlockingQueueHandler(q)
+    root.addHandler(_HANDLER)
+    _LISTENER = logging.handlers.QueueListener(q, out, respect_handler_level=False)
+    _LISTENER.start()
+
+
+def shutdown_logging() -> None:
+    """Write out everything queued and stop the writer thread."""
+    global _LISTENER
+    if _LISTENER is not None and _PID == os.getpid():
+        _LISTENER.stop()
+    _LISTENER = None
+
+
+def dropped_records() -> int:
+    return _HANDLER.dropped if _HANDLER is not None else 0
+
+
+def get_logger(name: str = "", root_name: str = _ROOT) -> EventLogger:
+    return EventLogger(logging.getLogger(f"{root_name}.{name}" if name else root_name), _LIMITER)
@@ -3,6 +3,12 @@ Gemini Live session client for telephony.
 
 This is the server-side equivalent of the browser demo logic in `frontend/geminilive.js`,
 implemented for asyncio Python websockets.
+
+With `reconnect_attempts > 0` a dropped upstream websocket no longer ends the call: `messages()`
+reconnects with exponential backoff, resuming the server-side session with the latest
+`sessionResumptionUpdate` handle when `session_resumption` is on (otherwise a fresh session with
+the same setup). Caller audio sent meanwhile is held in a bounded buffer (oldest dropped beyond
+`reconnect_buffer_s`) and replayed once the new session is `setupComplete`.
 """
 
 from __future__ import annotations
@@ -10,15 +16,18 @@ from __future__ import annotations
 import asyncio
 import json
 import ssl
+import time
+from collections import deque
 from dataclasses import dataclass
-from typing import AsyncIterator, Optional
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Deque, Optional
 
 import certifi
-import google.auth
-from google.auth.transport.requests import Request
 import websockets
 from websockets.exceptions import ConnectionClosed
 
+from token_cache import AccessTokenCache, get_token_cache
+
 
 @dataclass(frozen=True)
 class GeminiSessionConfig:
@@ -36,68 +45,148 @@ class GeminiSessionConfig:
     vad_prefix_ms: int = 400
     activity_handling: str = "START_OF_ACTIVITY_INTERRUPTS"
 
+    # Upstream drop recovery (see module docstring); 0 attempts = a drop ends the call
+    session_resumption: bool = False
+    reconnect_attempts: int = 0
+    reconnect_buffer_s: float = 5.0
+
+
+def build_setup_message(cfg: GeminiSessionConfig) -> dict:
+    setup_msg = {
+        "setup": {
+            "model": cfg.model_uri,
+            "generation_config": {
+                "response_modalities": ["AUDIO"],
+                "temperature": cfg.temperature,
+                "speech_config": {
+                    "voice_config": {
+                        "prebuilt_voice_config": {"voice_name": cfg.voice}
+                    }
+                },
+                "enable_affective_dialog": cfg.enable_affective_dialog,
+            },
+            "system_instruction": {"parts": [{"text": cfg.system_instructions}]},
+            "realtime_input_config": {
+                "automatic_activity_detection": {
+                    "disabled": False,
+                    "silence_duration_ms": cfg.vad_silence_ms,
+                    "prefix_padding_ms": cfg.vad_prefix_ms,
+                    "end_of_speech_sensitivity": "END_SENSITIVITY_UNSPECIFIED",
+                    "start_of_speech_sensitivity": "START_SENSITIVITY_UNSPECIFIED",
+                },
+                "activity_handling": cfg.activity_handling,
+            },
+        }
+    }
+
+    if cfg.enable_input_transcription:
+        setup_msg["setup"]["input_audio_transcription"] = {}
+    if cfg.enable_output_transcription:
+        setup_msg["setup"]["output_audio_transcription"] = {}
+    if cfg.session_resumption:
+        # Ask for sessionResumptionUpdate handles; a reconnect passes the latest one back here.
+        setup_msg["setup"]["session_resumption"] = {}
+
+    return setup_msg
+
+
+@lru_cache(maxsize=16)
+def serialized_setup(cfg: GeminiSessionConfig) -> str:
+    """JSON setup message, encoded once per (model, voice, prompt, ...) variant."""
+    return json.dumps(build_setup_message(cfg))
+
+
+# 16kHz PCM16 base64: 4 chars per 3 bytes, 2 bytes per sample
+_B64_CHARS_PER_SECOND = 16000 * 2 * 4 / 3
+
 
 class GeminiLiveSession:
-    def __init__(self, cfg: GeminiSessionConfig):
+    def __init__(self, cfg: GeminiSessionConfig, token_cache: Optional[AccessTokenCache] = None):
         self.cfg = cfg
         self._ws: Optional[websockets.WebSocketClientProtocol] = None
+        # Shared per process: token refresh happens in the background, never on connect().
+        self._token_cache = token_cache or get_token_cache()
+        self.connected_at: Optional[float] = None
+        self.setup_complete = False
 
-    @staticmethod
-    def _generate_access_token() -> str:
-        creds, _ = google.auth.default()
-        if not creds.valid:
-            creds.refresh(Request())
-        return creds.token
+        # Reconnect state
+        self.resumption_handle: Optional[str] = None
+        self.reconnects = 0
+        self.reconnect_failures = 0
+        self.audio_replayed = 0
+        self.audio_dropped = 0
+        # Called as on_reconnect(seconds, outcome) with outcome "resumed" / "fresh" / "failed".
+        self.on_reconnect: Optional[Callable[[float, str], None]] = None
+        self._closing = False
+        self._gave_up = False
+        self._reconnecting = False
+        self._pending: Deque[str] = deque()  # base64 audio chunks waiting for the new session
+        self._pending_chars = 0
 
     async def connect(self) -> None:
-        token = self._generate_access_token()
+        await self._open()
+
+    async def _open(self, handle: Optional[str] = None) -> None:
+        token = await self._token_cache.get_token()
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {token}",
         }
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        # Plain ws:// is only used for local stand-ins (load tests); real endpoints are wss://
+        ssl_context = None
+        if self.cfg.service_url.startswith("wss://"):
+            ssl_context = ssl.create_default_context(cafile=certifi.where())
 
         # Use extra_headers for broad compatibility with websockets versions.
         self._ws = await websockets.connect(
             self.cfg.service_url, extra_headers=headers, ssl=ssl_context
         )
 
-        # Send setup message
-        setup_msg = {
-            "setup": {
-                "model": self.cfg.model_uri,
-                "generation_config": {
-                    "response_modalities": ["AUDIO"],
-                    "temperature": self.cfg.temperature,
-                    "speech_config": {
-                        "voice_config": {
-                            "prebuilt_voice_config": {"voice_name": self.cfg.voice}
-                        }
-                    },
-                    "enable_affective_dialog": self.cfg.enable_affective_dialog,
-                },
-                "system_instruction": {"parts": [{"text": self.cfg.system_instructions}]},
-                "realtime_input_config": {
-                    "automatic_activity_detection": {
-                        "disabled": False,
-                        "silence_duration_ms": self.cfg.vad_silence_ms,
-                        "prefix_padding_ms": self.cfg.vad_prefix_ms,
-                        "end_of_speech_sensitivity": "END_SENSITIVITY_UNSPECIFIED",
-                        "start_of_speech_sensitivity": "START_SENSITIVITY_UNSPECIFIED",
-                    },
-                    "activity_handling": self.cfg.activity_handling,
-                },
-            }
-        }
+        self.setup_complete = False
+        if handle:
+            setup_msg = build_setup_message(self.cfg)
+            setup_msg["setup"]["session_resumption"] = {"handle": handle}
+            await self._ws.send(json.dumps(setup_msg))
+        else:
+            # Setup payload is pre-serialized once per config variant (it carries the multi-KB prompt)
+            await self._ws.send(serialized_setup(self.cfg))
+        self.connected_at = time.monotonic()
+
+    async def wait_setup_complete(self, timeout: float = 10.0) -> None:
+        """Consume server messages until `setupComplete` (used to pre-warm pooled sessions)."""
+        if self.setup_complete:
+            return
+        if not self._ws:
+            raise RuntimeError("GeminiLiveSession not connected")
+
+        async def _wait() -> None:
+            async for raw in self._ws:
+                msg = json.loads(raw)
+                self._track(msg)
+                if "setupComplete" in msg:
+                    self.setup_complete = True
+                    return
+            raise ConnectionError("Gemini closed before setupComplete")
+
+        await asyncio.wait_for(_wait(), timeout=timeout)
 
-        if self.cfg.enable_input_transcription:
-            setup_msg["setup"]["input_audio_transcription"] = {}
-        if self.cfg.enable_output_transcription:
-            setup_msg["setup"]["output_audio_transcription"] = {}
+    @property
+    def is_open(self) -> bool:
+        return self._ws is not None and self._ws.open
 
-        await self.send_json(setup_msg)
+    async def ping(self, timeout: float = 5.0) -> bool:
+        """Websocket-level health check for idle sessions."""
+        if not self.is_open:
+            return False
+        try:
+            pong = await self._ws.ping()
+            await asyncio.wait_for(pong, timeout=timeout)
+            return True
+        except Exception:
+            return False
 
     async def close(self) -> None:
+        self._closing = True
         if self._ws is not None and not self._ws.closed:
             await self._ws.close()
 
@@ -107,6 +196,18 @@ class GeminiLiveSession:
         await self._ws.send(json.dumps(msg))
 
     async def send_audio_b64_pcm16(self, audio_b64: str) -> None:
+        if self._reconnecting:
+            self._buffer_audio(audio_b64)
+            return
+        try:
+            await self._send_audio(audio_b64)
+        except ConnectionClosed:
+            if self.cfg.reconnect_attempts <= 0 or self._closing or self._gave_up:
+                raise
+            # The reader sees the same close and reconnects; keep this chunk for the replay.
+            self._buffer_audio(audio_b64)
+
+    async def _send_audio(self, audio_b64: str) -> None:
         # Matches browser demo: mime_type "audio/pcm"
         await self.send_json(
             {
@@ -116,13 +217,81 @@ class GeminiLiveSession:
             }
         )
 
+    def _buffer_audio(self, audio_b64: str) -> None:
+        self._pending.append(audio_b64)
+        self._pending_chars += len(audio_b64)
+        limit = self.cfg.reconnect_buffer_s * _B64_CHARS_PER_SECOND
+        while self._pending_chars > limit and len(self._pending) > 1:
+            self._pending_chars -= len(self._pending.popleft())
+            self.audio_dropped += 1
+
+    def _track(self, msg: dict) -> None:
+        update = msg.get("sessionResumptionUpdate")
+        if update:
+            if update.get("resumable", True) and update.get("newHandle"):
+                self.resumption_handle = update["newHandle"]
+
+    async def _reconnect(self) -> bool:
+        """Re-establish the upstream session after a drop; True once audio flows again."""
+        self._reconnecting = True
+        started = time.monotonic()
+        delay = 0.1
+        for _ in range(self.cfg.reconnect_attempts):
+            if self._closing:
+                break
+            handle = self.resumption_handle if self.cfg.session_resumption else None
+            opened = False
+            try:
+                await self._open(handle)
+                opened = True
+                await self.wait_setup_complete()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                if self._ws is not None:
+                    await self._ws.close()
+                if handle and opened:
+                    # Connected but setup was refused: the handle is stale, start a fresh session.
+                    self.resumption_handle = None
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2.0)
+                continue
+
+            try:
+                while self._pending:
+                    audio_b64 = self._pending[0]
+                    await self._send_audio(audio_b64)
+                    self._pending.popleft()
+                    self._pending_chars -= len(audio_b64)
+                    self.audio_replayed += 1
+            except ConnectionClosed:
+                continue  # dropped again mid-replay: keep what is left and retry
+            self._reconnecting = False
+            self.reconnects += 1
+            if self.on_reconnect is not None:
+                self.on_reconnect(time.monotonic() - started, "resumed" if handle else "fresh")
+            return True
+
+        self._reconnecting = False
+        self._gave_up = True
+        self.reconnect_failures += 1
+        if self.on_reconnect is not None:
+            self.on_reconnect(time.monotonic() - started, "failed")
+        return False
+
     async def messages(self) -> AsyncIterator[dict]:
         if not self._ws:
             raise RuntimeError("GeminiLiveSession not connected")
-        try:
-            async for raw in self._ws:
-                yield json.loads(raw)
-        except ConnectionClosed:
-            return
-
-
+        while True:
+            try:
+                async for raw in self._ws:
+                    msg = json.loads(raw)
+                    self._track(msg)
+                    yield msg
+            except ConnectionClosed:
+                pass
+            # The upstream went away (network drop, goAway at the session time limit, ...)
+            if self._closing or self.cfg.reconnect_attempts <= 0:
+                return
+            if not await self._reconnect():
+                return
@@ -0,0 +1,160 @@
+"""
+Local stand-in for the Gemini Live `BidiGenerateContent` websocket (load tests; no network/GCP).
+
+Implements the subset the telephony service uses:
+- `setup` -> `{"setupComplete": {}}`, then an optional synthetic greeting (24kHz tone), streamed
+  faster than real time like the real model
+- `realtime_input` (16kHz PCM16 base64): every voiced chunk is echoed straight back as 24kHz
+  `modelTurn` audio, so a client can time frame forwarding end to end
+- caller speech onset -> `{"serverContent": {"interrupted": true}}` (exercises barge-in)
+- speech -> silence -> `{"serverContent": {"turnComplete": true}}`
+- `setup.input_audio_transcription` / `output_audio_transcription` -> a short text fragment per voiced
+  input chunk / per model audio chunk (`inputTranscription` / `outputTranscription`), like the real
+  model's incremental transcripts
+- `setup.session_resumption` -> a `sessionResumptionUpdate` handle after setup; a setup carrying a
+  known handle resumes without the greeting. `--drop-after-s` closes every session after that long
+  (abnormally, like a network drop) to exercise the service's reconnect path
+
+Run standalone:
+    python3 gemini_standin.py --port 18900
+and point the service at it with GEMINI_SERVICE_URL=ws://127.0.0.1:18900 GEMINI_ACCESS_TOKEN=test.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+
+import numpy as np
+import websockets
+from websockets.exceptions import ConnectionClosed
+
+INPUT_SR = 16000
+OUTPUT_SR = 24000
+
+
+def _model_audio(samples_24k: np.ndarray) -> str:
+    data = base64.b64encode(samples_24k.astype(np.int16).tobytes()).decode("ascii")
+    return json.dumps(
+        {"serverContent": {"modelTurn": {"parts": [{"inlineData": {"mimeType": "audio/pcm", "data": data}}]}}}
+    )
+
+
+def _transcription(kind: str, text: str) -> str:
+    return json.dumps({"serverContent": {kind: {"text": text}}})
+
+
+def _upsample_16k_to_24k(x: np.ndarray) -> np.ndarray:
+    n_out = x.size * OUTPUT_SR // INPUT_SR
+    src = np.arange(n_out) * (INPUT_SR / OUTPUT_SR)
+    return np.interp(src, np.arange(x.size), x.astype(np.float32)).astype(np.int16)
+
+
+def _tone(ms: int, freq: float = 440.0, amplitude: int = 8000) -> np.ndarray:
+    t = np.arange(OUTPUT_SR * ms // 1000) / OUTPUT_SR
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+class StandinServer:
+    def __init__(
+        self,
+        greeting_ms: int = 1000,
+        chunk_ms: int = 40,
+        rms_threshold: float = 500.0,
+        drop_after_s: float = 0.0,
+    ):
+        self.greeting_ms = greeting_ms
+        self.chunk_ms = chunk_ms
+        self.rms_threshold = rms_threshold
+        self.drop_after_s = drop_after_s
+        self.sessions = 0
+        self.resumed = 0
+        self._handles: "set[str]" = set()
+
+    async def _stream(self, ws, audio: np.ndarray, transcribe: bool = False) -> None:
+        # Faster than real time (like Gemini): one chunk per event-loop turn.
+        step = OUTPUT_SR * self.chunk_ms // 1000
+        for i in range(0, audio.size, step):
+            await ws.send(_model_audio(audio[i : i + step]))
+            if transcribe:
+                await ws.send(_transcription("outputTranscription", "hello "))
+            await asyncio.sleep(0)
+        await ws.send(json.dumps({"serverContent": {"turnComplete": True}}))
+
+    async def handle(self, ws, path: str = "") -> None:
+        self.sessions += 1
+        try:
+            setup = json.loads(await ws.recv())
+            if "setup" not in setup:
+                await ws.close(code=1008, reason="Expected setup")
+                return
+            transcribe_in = "input_audio_transcription" in setup["setup"]
+            transcribe_out = "output_audio_transcription" in setup["setup"]
+            resumption = setup["setup"].get("session_resumption")
+            resumed = bool(resumption and resumption.get("handle") in self._handles)
+            if resumption and resumption.get("handle") and not resumed:
+                await ws.close(code=1008, reason="Unknown session resumption handle")
+                return
+            await ws.send(json.dumps({"setupComplete": {}}))
+            if resumption is not None:
+                handle = f"standin-{self.sessions}"
+                self._handles.add(handle)
+                await ws.send(json.dumps({"sessionResumptionUpdate": {"newHandle": handle, "resumable": True}}))
+            if self.drop_after_s:
+                asyncio.get_running_loop().call_later(self.drop_after_s, ws.transport.abort)
+            if resumed:
+                self.resumed += 1
+            elif self.greeting_ms:
+                await self._stream(ws, _tone(self.greeting_ms), transcribe_out)
+
+            speaking = False
+            async for raw in ws:
+                msg = json.loads(raw)
+                chunks = (msg.get("realtime_input") or {}).get("media_chunks") or []
+                for chunk in chunks:
+                    x = np.frombuffer(base64.b64decode(chunk.get("data", "")), dtype=np.int16)
+                    if not x.size:
+                        continue
+                    xf = x.astype(np.float32)
+                    voiced = float(np.sqrt(np.dot(xf, xf) / xf.size)) >= self.rms_threshold
+                    if voiced:
+                        if not speaking:
+                            speaking = True
+                            await ws.send(json.dumps({"serverContent": {"interrupted": True}}))
+                        if transcribe_in:
+                            await ws.send(_transcription("inputTranscription", "test "))
+                        await ws.send(_model_audio(_upsample_16k_to_24k(x)))
+                        if transcribe_out:
+                            await ws.send(_transcription("outputTranscription", "echo "))
+                    elif speaking:
+                        speaking = False
+                        await ws.send(json.dumps({"serverContent": {"turnComplete": True}}))
+        except ConnectionClosed:
+            pass
+
+
+async def serve(host: str, port: int, server: StandinServer) -> None:
+    async with websockets.serve(server.handle, host, port, max_size=None):
+        print(f"🧪 Gemini Live stand-in listening on ws://{host}:{port}", flush=True)
+        await asyncio.Future()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=18900)
+    ap.add_argument("--greeting-ms", type=int, default=1000)
+    ap.add_argument("--chunk-ms", type=int, default=40)
+    ap.add_argument("--drop-after-s", type=float, default=0.0, help="abort each session after this long")
+    args = ap.parse_args()
+    server = StandinServer(args.greeting_ms, args.chunk_ms, drop_after_s=args.drop_after_s)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
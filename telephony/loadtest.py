@@ -0,0 +1,399 @@
+"""
+Concurrent-call load test for the telephony service, fully local (no network / GCP credentials).
+
+Starts `gemini_standin.py` and `main.py` as subprocesses (the service is pointed at the stand-in via
+GEMINI_SERVICE_URL / GEMINI_ACCESS_TOKEN), then for each concurrency level simulates N Waybeo
+clients speaking the `start` / `media` / `stop` protocol with real-time 8kHz pacing. Each client
+alternates tone "utterances" with line noise; the stand-in echoes voiced audio straight back, so the
+client measures frame-forwarding latency (utterance onset sent -> echoed audio received) end to end.
+
+Per level it reports p50/p99 forwarding latency, service CPU per call, service event-loop lag
+(from its /metrics) and the generator's own loop lag, and flags the first level that breaks the SLOs.
+
+    cd telephony
+    python3 loadtest.py --calls 10,50,100,200 --duration 20
+
+Any other service setting (WORKERS, AUDIO_BUFFER_MS_INPUT, PLAYOUT_*, ...) is taken from the environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import websockets
+
+from audio_processor import AudioProcessor, AudioRates
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TELEPHONY_SR = 8000
+
+
+@dataclass
+class LevelResult:
+    calls: int
+    completed: int = 0
+    failed: int = 0
+    frames_sent: int = 0
+    frames_received: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    latency_p50_ms: Optional[float] = None
+    latency_p99_ms: Optional[float] = None
+    cpu_pct_core_per_call: Optional[float] = None
+    service_loop_lag_p99_ms: Optional[float] = None
+    generator_loop_lag_p99_ms: Optional[float] = None
+    slo_ok: bool = True
+    slo_violations: List[str] = field(default_factory=list)
+
+
+# ---- subprocess / measurement helpers ----
+def _proc_cpu_seconds(pids: List[int]) -> Optional[float]:
+    total = 0.0
+    tick = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / tick  # utime + stime
+        except (OSError, IndexError, ValueError):
+            return None
+    return total
+
+
+def _child_pids(pid: int) -> List[int]:
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+_BUCKET_RE = re.compile(r'^telephony_event_loop_lag_seconds_bucket\{le="([^"]+)"\} (\d+)', re.M)
+
+
+def _scrape_loop_lag(ports: List[int]) -> Dict[float, int]:
+    buckets: Dict[float, int] = {}
+    for port in ports:
+        try:
+            body = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=2).read().decode()
+        except OSError:
+            continue
+        for le, count in _BUCKET_RE.findall(body):
+            bound = float("inf") if le == "+Inf" else float(le)
+            buckets[bound] = buckets.get(bound, 0) + int(count)
+    return buckets
+
+
+def _bucket_quantile(before: Dict[float, int], after: Dict[float, int], q: float) -> Optional[float]:
+    bounds = sorted(after)
+    delta = [(b, after[b] - before.get(b, 0)) for b in bounds]
+    total = delta[-1][1] if delta else 0
+    if total <= 0:
+        return None
+    for bound, cum in delta:
+        if cum >= q * total:
+            return bound
+    return None
+
+
+async def _wait_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"port {port} did not open within {timeout}s")
+
+
+# ---- simulated Waybeo client ----
+class Client:
+    def __init__(
+        self,
+        idx: int,
+        url: str,
+        frame_ms: int,
+        utterance_ms: int,
+        gap_ms: int,
+        transport: str = "json",
+        encoding: str = "pcm16",
+    ):
+        self.ucid = f"loadtest-{idx}"
+        self.url = url
+        self.transport = transport
+        self.codec = AudioProcessor(AudioRates(), encoding)
+        self.frame_samples = TELEPHONY_SR * frame_ms // 1000
+        self.frame_s = frame_ms / 1000.0
+        self.utterance_frames = max(1, utterance_ms // frame_ms)
+        self.cycle_frames = self.utterance_frames + max(1, gap_ms // frame_ms)
+        # Leave time for the stand-in greeting before the first utterance
+        self.lead_frames = max(1, 1500 // frame_ms)
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latencies: List[float] = []
+        self._onset_sent_at = 0.0
+
+        rng = np.random.default_rng(idx)
+        t = np.arange(self.frame_samples) / TELEPHONY_SR
+        # Frames are the same every cycle; encode them once.
+        tone = (6000 * np.sin(2 * np.pi * 300 * t)).astype(np.int16)
+        noise = rng.integers(-40, 40, self.frame_samples).astype(np.int16)
+        self._tone = self._encode(tone)
+        self._noise = self._encode(noise)
+
+    def _encode(self, samples: np.ndarray):
+        if self.transport == "binary":
+            return self.codec.encode_payload(samples)
+        data: Dict[str, object] = {
+            "bitsPerSample": 16,
+            "sampleRate": TELEPHONY_SR,
+            "channelCount": 1,
+            "numberOfFrames": int(samples.size),
+            "type": "data",
+        }
+        if self.transport == "base64":
+            data["payload"] = base64.b64encode(self.codec.encode_payload(samples)).decode("ascii")
+        else:
+            data["samples"] = samples.tolist()
+        return json.dumps({"event": "media", "type": "media", "ucid": self.ucid, "data": data})
+
+    def _frame(self, k: int) -> Tuple[object, bool]:
+        pos = k - self.lead_frames
+        voiced = pos >= 0 and pos % self.cycle_frames < self.utterance_frames
+        return (self._tone if voiced else self._noise), voiced and pos % self.cycle_frames == 0
+
+    def _decode(self, raw) -> Optional[np.ndarray]:
+        if isinstance(raw, bytes):
+            return self.codec.decode_payload(raw)
+        data = json.loads(raw).get("data") or {}
+        if data.get("payload"):
+            return self.codec.decode_payload(base64.b64decode(data["payload"]))
+        if data.get("samples"):
+            return np.asarray(data["samples"], dtype=np.int16)
+        return None
+
+    async def _reader(self, ws) -> None:
+        async for raw in ws:
+            self.bytes_received += len(raw)
+            samples = self._decode(raw)
+            if samples is None or not samples.size:
+                continue
+            self.frames_received += 1
+            if self._onset_sent_at:
+                x = samples.astype(np.float32)
+                if float(np.sqrt(np.dot(x, x) / x.size)) >= 500.0:
+                    self.latencies.append(time.monotonic() - self._onset_sent_at)
+                    self._onset_sent_at = 0.0
+
+    async def run(self, duration_s: float) -> None:
+        async with websockets.connect(self.url, max_size=None) as ws:
+            start = {"event": "start", "ucid": self.ucid, "transport": self.transport, "encoding": self.codec.encoding}
+            await ws.send(json.dumps(start))
+            reader = asyncio.create_task(self._reader(ws))
+            try:
+                t0 = time.monotonic()
+                n_frames = int(duration_s / self.frame_s)
+                for k in range(n_frames):
+                    # Absolute schedule so pacing does not drift under load
+                    delay = t0 + k * self.frame_s - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    frame, onset = self._frame(k)
+                    await ws.send(frame)
+                    self.frames_sent += 1
+                    self.bytes_sent += len(frame)
+                    if onset:
+                        self._onset_sent_at = time.monotonic()
+                await ws.send(json.dumps({"event": "stop", "ucid": self.ucid}))
+            finally:
+                reader.cancel()
+                try:
+                    await reader
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+
+async def _generator_lag(samples: List[float], interval_s: float = 0.05) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval_s)
+        samples.append(max(0.0, loop.time() - start - interval_s))
+
+
+async def run_level(args, n_calls: int, service_pid: int, metrics_ports: List[int]) -> LevelResult:
+    url = f"ws://127.0.0.1:{args.port}/ws"
+    clients = [
+        Client(i, url, args.frame_ms, args.utterance_ms, args.gap_ms, args.transport, args.encoding)
+        for i in range(n_calls)
+    ]
+    pids = [service_pid] + _child_pids(service_pid)
+    lag_before = _scrape_loop_lag(metrics_ports)
+    cpu_before = _proc_cpu_seconds(pids)
+    gen_lag: List[float] = []
+    lag_task = asyncio.create_task(_generator_lag(gen_lag))
+
+    async def one(i: int, client: Client) -> bool:
+        await asyncio.sleep(i * args.ramp_s / max(1, n_calls))
+        try:
+            await client.run(args.duration)
+            return True
+        except Exception:
+            return False
+
+    t0 = time.monotonic()
+    outcomes = await asyncio.gather(*(one(i, c) for i, c in enumerate(clients)))
+    elapsed = time.monotonic() - t0
+    lag_task.cancel()
+
+    result = LevelResult(calls=n_calls)
+    result.completed = sum(outcomes)
+    result.failed = n_calls - result.completed
+    result.frames_sent = sum(c.frames_sent for c in clients)
+    result.frames_received = sum(c.frames_received for c in clients)
+    result.bytes_sent = sum(c.bytes_sent for c in clients)
+    result.bytes_received = sum(c.bytes_received for c in clients)
+    latencies = np.array([lat for c in clients for lat in c.latencies]) * 1000.0
+    if latencies.size:
+        result.latency_p50_ms = round(float(np.percentile(latencies, 50)), 1)
+        result.latency_p99_ms = round(float(np.percentile(latencies, 99)), 1)
+    cpu_after = _proc_cpu_seconds(pids)
+    if cpu_before is not None and cpu_after is not None:
+        result.cpu_pct_core_per_call = round(100.0 * (cpu_after - cpu_before) / elapsed / n_calls, 2)
+    lag_p99 = _bucket_quantile(lag_before, _scrape_loop_lag(metrics_ports), 0.99)
+    if lag_p99 is not None:
+        result.service_loop_lag_p99_ms = lag_p99 * 1000.0
+    if gen_lag:
+        result.generator_loop_lag_p99_ms = round(float(np.percentile(gen_lag, 99)) * 1000.0, 1)
+
+    if result.failed:
+        result.slo_violations.append(f"{result.failed} calls failed")
+    if result.latency_p99_ms is None or result.latency_p99_ms > args.slo_p99_ms:
+        result.slo_violations.append(f"p99 forwarding latency > {args.slo_p99_ms}ms")
+    if result.service_loop_lag_p99_ms is not None and result.service_loop_lag_p99_ms > args.slo_loop_lag_ms:
+        result.slo_violations.append(f"service loop lag p99 > {args.slo_loop_lag_ms}ms")
+    result.slo_ok = not result.slo_violations
+    return result
+
+
+async def amain(args) -> List[LevelResult]:
+    levels = [int(x) for x in args.calls.split(",") if x.strip()]
+    workers = int(os.getenv("WORKERS", "1"))
+    metrics_ports = [args.metrics_port + i for i in range(workers)] if workers > 1 else [args.metrics_port]
+
+    standin = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "gemini_standin.py"), "--port", str(args.standin_port),
+         "--greeting-ms", str(args.greeting_ms), "--drop-after-s", str(args.standin_drop_after_s)],
+        cwd=HERE,
+    )
+    env = dict(os.environ)
+    env.update(
+        {
+            "GCP_PROJECT_ID": env.get("GCP_PROJECT_ID", "loadtest"),
+            "GEMINI_SERVICE_URL": f"ws://127.0.0.1:{args.standin_port}",
+            "GEMINI_ACCESS_TOKEN": "loadtest",
+            "HOST": "127.0.0.1",
+            "PORT": str(args.port),
+            "WS_PATH": "/ws",
+            "METRICS_PORT": str(args.metrics_port),
+            "WORKER_STATS_INTERVAL_S": env.get("WORKER_STATS_INTERVAL_S", "3600"),
+        }
+    )
+    service = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "main.py")], cwd=HERE, env=env, stdout=subprocess.DEVNULL
+    )
+    results: List[LevelResult] = []
+    try:
+        await _wait_port(args.standin_port)
+        await _wait_port(args.port)
+        for port in metrics_ports:
+            await _wait_port(port)
+        for n in levels:
+            print(f"▶️  {n} concurrent calls for {args.duration:.0f}s ...", flush=True)
+            result = await run_level(args, n, service.pid, metrics_ports)
+            results.append(result)
+            print(
+                f"   completed={result.completed}/{n} p50={result.latency_p50_ms}ms "
+                f"p99={result.latency_p99_ms}ms cpu/call={result.cpu_pct_core_per_call}% core "
+                f"ws/call={(result.bytes_sent + result.bytes_received) / 1024 / args.duration / n:.1f}KiB/s "
+                f"loop_lag_p99={result.service_loop_lag_p99_ms}ms "
+                f"(generator {result.generator_loop_lag_p99_ms}ms) "
+                f"{'✅' if result.slo_ok else '❌ ' + '; '.join(result.slo_violations)}",
+                flush=True,
+            )
+            if not result.slo_ok and args.stop_on_break:
+                break
+            await asyncio.sleep(1.0)
+    finally:
+        for proc in (service, standin):
+            proc.terminate()
+        for proc in (service, standin):
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", default="10,25,50,100", help="comma-separated concurrency levels")
+    ap.add_argument("--duration", type=float, default=20.0, help="seconds per level")
+    ap.add_argument("--ramp-s", type=float, default=2.0, help="spread call starts over this many seconds")
+    ap.add_argument("--frame-ms", type=int, default=20, help="Waybeo media frame size")
+    ap.add_argument("--utterance-ms", type=int, default=600)
+    ap.add_argument("--gap-ms", type=int, default=1400)
+    ap.add_argument(
+        "--transport", choices=("json", "base64", "binary"), default="json", help="Waybeo audio transport"
+    )
+    ap.add_argument(
+        "--encoding", choices=("pcm16", "mulaw", "alaw"), default="pcm16", help="audio bytes for base64/binary"
+    )
+    ap.add_argument("--greeting-ms", type=int, default=500)
+    ap.add_argument(
+        "--standin-drop-after-s", type=float, default=0.0, help="stand-in aborts each upstream session after this long"
+    )
+    ap.add_argument("--port", type=int, default=18950)
+    ap.add_argument("--standin-port", type=int, default=18900)
+    ap.add_argument("--metrics-port", type=int, default=18960)
+    ap.add_argument("--slo-p99-ms", type=float, default=500.0)
+    ap.add_argument("--slo-loop-lag-ms", type=float, default=50.0)
+    ap.add_argument("--stop-on-break", action="store_true", help="stop at the first level breaking an SLO")
+    ap.add_argument("--json", default="", help="write results to this JSON file")
+    args = ap.parse_args()
+
+    try:
+        results = asyncio.run(amain(args))
+    except KeyboardInterrupt:
+        return
+
+    broken = next((r for r in results if not r.slo_ok), None)
+    if broken is not None:
+        print(f"📉 SLOs break at {broken.calls} concurrent calls: {'; '.join(broken.slo_violations)}")
+    elif results:
+        print(f"📈 SLOs held up to {results[-1].calls} concurrent calls")
+    if any(r.generator_loop_lag_p99_ms and r.generator_loop_lag_p99_ms > 20 for r in results):
+        print("⚠️  Load generator loop lag is high; results at those levels are generator-bound")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(r) for r in results], f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,37 +15,163 @@ This service bridges telephony audio to Gemini Live:
 from __future__ import annotations
 
 import asyncio
-import json
+import logging
 import os
+import signal
+import time
 from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qs
 
 import websockets
 from websockets.exceptions import ConnectionClosed
 
+import metrics
+from admission import AdmissionController
 from config import Config
-from audio_processor import AudioProcessor, AudioRates
+from audio_engine import AudioEngine, EngineStream
+from audio_processor import ENCODING_PCM16, AudioProcessor, AudioRates
+from call_recorder import CallRecorder, CallRecording
+from call_trace import CallTrace, TraceWriter
+from event_log import (
+    EventLogger,
+    configure_logging,
+    dropped_records,
+    get_logger,
+    parse_event_rates,
+    shutdown_logging,
+)
 from gemini_live import GeminiLiveSession, GeminiSessionConfig
+from media_codec import (
+    TRANSPORT_BINARY,
+    TRANSPORT_JSON,
+    TRANSPORTS,
+    MediaFrameEncoder,
+    decode_frame,
+    loads as json_loads,
+)
+from playout import PlayoutScheduler
+from prompt_cache import PromptCache
+from ring_buffer import Int16RingBuffer
+from send_queue import BoundedSendQueue
+from session_pool import GeminiSessionPool
+from silence_gate import SilenceGate
+from supervisor import CallCounters, Supervisor
+from token_cache import get_token_cache
+from transcript_sink import CallTranscript, TranscriptSink
+from uplink_framer import AdaptiveUplinkFramer, SpeechDetector
 
 
-@dataclass
+# Replaced with a shared-memory slot when running as a worker under `Supervisor`.
+CALLS = CallCounters.local()
+
+# Admission control / drain state for this worker (configured in main())
+ADMISSION = AdmissionController()
+
+# Pre-warmed Gemini sessions (enabled with GEMINI_POOL_SIZE > 0)
+POOL: Optional[GeminiSessionPool] = None
+
+# System prompt, re-read only when PROMPT_FILE changes on disk
+PROMPT_CACHE = PromptCache(
+    os.getenv("PROMPT_FILE", os.path.join(os.path.dirname(__file__), "kia_prompt.txt"))
+)
+
+# Stereo WAV call recordings written by a background thread (enabled with RECORDING_DIR)
+RECORDER: Optional[CallRecorder] = None
+
+# Batched SQLite writer for per-turn transcripts (enabled with TRANSCRIPTION_ENABLED)
+TRANSCRIPTS: Optional[TranscriptSink] = None
+
+# Per-call JSONL latency summaries (enabled with CALL_TRACE_FILE)
+TRACE_WRITER: Optional[TraceWriter] = None
+
+# Event-loop lag sampler feeding ADMISSION (load shedding) and the lag histogram
+LAG_MONITOR: Optional[asyncio.Task] = None
+
+# Batched resampling across all calls on a fixed tick (enabled with AUDIO_ENGINE_TICK_MS > 0)
+ENGINE: Optional[AudioEngine] = None
+
+# Structured JSON events (see event_log); call handlers log through session.log, bound to the ucid
+LOG = get_logger()
+
+
+@dataclass(eq=False)
 class TelephonySession:
     ucid: str
     client_ws: websockets.WebSocketServerProtocol
     gemini: GeminiLiveSession
-    input_buffer: list[int]
-    output_buffer: list[int]
+    input_buffer: Int16RingBuffer
+    output_buffer: Int16RingBuffer
+    uplink: BoundedSendQueue  # -> Gemini (base64 PCM16 audio)
+    downlink: BoundedSendQueue  # -> Waybeo (encoded JSON frames)
+    trace: CallTrace
+    playout: Optional[PlayoutScheduler] = None
+    transport: str = TRANSPORT_JSON  # audio framing towards Waybeo (see media_codec)
+    recording: Optional[CallRecording] = None
+    transcript: Optional[CallTranscript] = None
+    # Audio engine streams (None: resampled inline by this call's coroutines)
+    uplink_stream: Optional[EngineStream] = None
+    downlink_stream: Optional[EngineStream] = None
+    log: EventLogger = LOG
     closed: bool = False
 
 
-def _read_prompt_text() -> str:
-    prompt_file = os.getenv("PROMPT_FILE", os.path.join(os.path.dirname(__file__), "kia_prompt.txt"))
-    try:
-        with open(prompt_file, "r", encoding="utf-8") as f:
-            return f.read()
-    except Exception:
-        # fallback: minimal prompt if file missing
-        return "You are a helpful Kia Motors sales assistant. Be concise and friendly."
+# Stand-in message for an inbound binary (raw PCM16) media frame
+_BINARY_MEDIA: Dict[str, Any] = {"event": "media"}
+
+# Sessions in progress in this process (for scrape-time queue depth metrics)
+ACTIVE_SESSIONS: "set[TelephonySession]" = set()
+
+
+def _build_gemini_config(cfg: Config, prompt: str) -> GeminiSessionConfig:
+    return GeminiSessionConfig(
+        service_url=cfg.GEMINI_SERVICE_URL,
+        model_uri=cfg.model_uri,
+        voice=cfg.GEMINI_VOICE,
+        system_instructions=prompt,
+        enable_affective_dialog=True,
+        enable_input_transcription=cfg.TRANSCRIPTION_ENABLED,
+        enable_output_transcription=cfg.TRANSCRIPTION_ENABLED,
+        vad_silence_ms=300,
+        vad_prefix_ms=400,
+        activity_handling="START_OF_ACTIVITY_INTERRUPTS",
+        session_resumption=cfg.GEMINI_SESSION_RESUMPTION,
+        reconnect_attempts=cfg.GEMINI_RECONNECT_ATTEMPTS,
+        reconnect_buffer_s=cfg.GEMINI_RECONNECT_BUFFER_MS / 1000.0,
+    )
+
+
+# (prompt version, config) of the last built session config; rebuilt only when the prompt changes.
+_GEMINI_CFG: Optional[Tuple[int, GeminiSessionConfig]] = None
+
+
+def _current_gemini_config(cfg: Config) -> GeminiSessionConfig:
+    global _GEMINI_CFG
+    text = PROMPT_CACHE.text()
+    if _GEMINI_CFG is not None and _GEMINI_CFG[0] == PROMPT_CACHE.version:
+        return _GEMINI_CFG[1]
+    gemini_cfg = _build_gemini_config(cfg, text)
+    if _GEMINI_CFG is not None:
+        LOG.info("prompt_reloaded", path=PROMPT_CACHE.path, chars=len(text))
+        if POOL is not None:
+            # Warm sessions were set up with the old prompt.
+            POOL.retire(_GEMINI_CFG[1])
+            POOL.register(gemini_cfg)
+    _GEMINI_CFG = (PROMPT_CACHE.version, gemini_cfg)
+    return gemini_cfg
+
+
+def _requested(path: str, start_msg: Dict[str, Any], key: str, default: str) -> str:
+    """`?<key>=` on the websocket URL, else a `<key>` field in the start event, else `default`."""
+    query = parse_qs((path or "").partition("?")[2])
+    requested = (
+        (query.get(key) or [None])[0]
+        or start_msg.get(key)
+        or start_msg.get("start", {}).get(key)
+        or start_msg.get("data", {}).get(key)
+        or default
+    )
+    return str(requested).lower()
 
 
 def _extract_audio_b64_from_gemini_message(msg: Dict[str, Any]) -> Optional[str]:
@@ -62,52 +188,186 @@ def _is_interrupted(msg: Dict[str, Any]) -> bool:
     return bool(msg.get("serverContent", {}).get("interrupted"))
 
 
+def _is_turn_complete(msg: Dict[str, Any]) -> bool:
+    return bool(msg.get("serverContent", {}).get("turnComplete"))
+
+
+def _queue_depth_metrics(reduce) -> Dict[tuple, float]:
+    sessions = list(ACTIVE_SESSIONS)
+    return {
+        ("uplink",): float(reduce([s.uplink.depth for s in sessions] or [0])),
+        ("downlink",): float(reduce([s.downlink.depth for s in sessions] or [0])),
+    }
+
+
 async def _gemini_reader(
     session: TelephonySession, audio_processor: AudioProcessor, cfg: Config
 ) -> None:
+    encoder = MediaFrameEncoder(
+        session.ucid,
+        cfg.TELEPHONY_SR,
+        session.transport,
+        encode_payload=audio_processor.encode_payload,
+        encoding=audio_processor.encoding,
+    )
+
+    def send_frame(samples) -> None:
+        t0 = time.perf_counter()
+        frame = encoder.encode(samples)
+        metrics.FRAME_SECONDS.observe(time.perf_counter() - t0, stage="downlink_frame_encode")
+        turn_latency = session.trace.on_outbound_frame()
+        if turn_latency is not None:
+            metrics.TURN_LATENCY_SECONDS.observe(turn_latency)
+        if session.recording is not None:
+            session.recording.agent(samples)
+        # Never blocks on the carrier socket; the downlink sender task does the actual send.
+        session.downlink.put_audio(frame)
+
+    async def send_paced_frame(samples) -> None:
+        send_frame(samples)
+
+    def play(samples_8k) -> None:
+        if session.playout is not None:
+            # Released on a real-time clock by the playout task
+            session.playout.enqueue(samples_8k)
+            return
+
+        session.output_buffer.append(samples_8k)
+
+        # send consistent chunks
+        while len(session.output_buffer) >= cfg.AUDIO_BUFFER_SAMPLES_OUTPUT:
+            send_frame(session.output_buffer.read(cfg.AUDIO_BUFFER_SAMPLES_OUTPUT))
+
+    if ENGINE is not None:
+        session.downlink_stream = ENGINE.stream(
+            audio_processor.output_resampler, play, stage="downlink_decode_resample"
+        )
+
+    playout_task: Optional[asyncio.Task] = None
+    if cfg.PLAYOUT_PACED:
+        session.playout = PlayoutScheduler(
+            session.output_buffer,
+            send_paced_frame,
+            cfg.TELEPHONY_SR,
+            frame_ms=cfg.PLAYOUT_FRAME_MS,
+            lead_ms=cfg.PLAYOUT_LEAD_MS,
+        )
+        playout_task = asyncio.create_task(session.playout.run())
+
     try:
         async for msg in session.gemini.messages():
-            if cfg.DEBUG:
-                if msg.get("setupComplete"):
-                    print(f"[{session.ucid}] 🏁 Gemini setupComplete")
+            if msg.get("setupComplete"):
+                session.log.debug("gemini_setup_complete")
+
+            if session.transcript is not None:
+                session.transcript.on_message(msg)
 
             if _is_interrupted(msg):
-                # Barge-in: clear any queued audio to telephony
-                if cfg.DEBUG:
-                    print(f"[{session.ucid}] 🛑 Gemini interrupted → clearing output buffer")
-                session.output_buffer.clear()
+                session.trace.on_interrupted()
+                # Barge-in: drop any audio not yet sent to telephony
+                if session.playout is not None:
+                    dropped = session.playout.interrupt()
+                else:
+                    dropped = len(session.output_buffer)
+                    session.output_buffer.clear()
+                session.downlink.clear_audio()
+                audio_processor.reset_output()
+                if session.downlink_stream is not None:
+                    session.downlink_stream.reset()  # model audio still waiting for the engine
+                session.log.debug("gemini_interrupted", dropped_ms=dropped * 1000 // cfg.TELEPHONY_SR)
                 continue
 
+            if _is_turn_complete(msg):
+                session.trace.on_turn_end()
+
             audio_b64 = _extract_audio_b64_from_gemini_message(msg)
             if not audio_b64:
                 continue
+            session.trace.on_model_audio()
+
+            if session.downlink_stream is not None:
+                # Resampled together with every other call's audio on the next engine tick
+                session.downlink_stream.submit(audio_processor.decode_gemini_b64(audio_b64))
+                continue
 
-            samples_8k = audio_processor.process_output_gemini_b64_to_8k_samples(audio_b64)
-            session.output_buffer.extend(samples_8k)
-
-            # send consistent chunks
-            while len(session.output_buffer) >= cfg.AUDIO_BUFFER_SAMPLES_OUTPUT:
-                chunk = session.output_buffer[: cfg.AUDIO_BUFFER_SAMPLES_OUTPUT]
-                session.output_buffer = session.output_buffer[cfg.AUDIO_BUFFER_SAMPLES_OUTPUT :]
-
-                payload = {
-                    "event": "media",
-                    "type": "media",
-                    "ucid": session.ucid,
-                    "data": {
-                        "samples": chunk,
-                        "bitsPerSample": 16,
-                        "sampleRate": cfg.TELEPHONY_SR,
-                        "channelCount": 1,
-                        "numberOfFrames": len(chunk),
-                        "type": "data",
-                    },
-                }
-                if session.client_ws.open:
-                    await session.client_ws.send(json.dumps(payload))
+            t0 = time.perf_counter()
+            samples_8k = audio_processor.process_output_gemini_b64_to_8k_np(audio_b64)
+            metrics.FRAME_SECONDS.observe(time.perf_counter() - t0, stage="downlink_decode_resample")
+            play(samples_8k)
     except Exception as e:
-        if cfg.DEBUG:
-            print(f"[{session.ucid}] ❌ Gemini reader error: {e}")
+        session.log.warning("gemini_reader_error", error=str(e))
+    finally:
+        if session.downlink_stream is not None:
+            session.downlink_stream.close()
+        if playout_task is not None:
+            playout_task.cancel()
+            try:
+                await playout_task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+def _on_gemini_reconnect(session: TelephonySession, cfg: Config, seconds: float, outcome: str) -> None:
+    metrics.GEMINI_RECONNECT_SECONDS.observe(seconds, outcome=outcome)
+    (session.log.warning if outcome == "failed" else session.log.info)(
+        "gemini_reconnect",
+        outcome=outcome,
+        ms=round(seconds * 1000),
+        replayed=session.gemini.audio_replayed,
+        dropped=session.gemini.audio_dropped,
+    )
+
+
+def _on_token_refresh(seconds: float, error: Optional[str]) -> None:
+    metrics.TOKEN_REFRESH_SECONDS.observe(seconds, outcome="failed" if error else "ok")
+    if error:
+        LOG.warning("token_refresh_failed", ms=round(seconds * 1000), error=error)
+    else:
+        LOG.debug("token_refreshed", ms=round(seconds * 1000))
+
+
+async def _send_to_gemini(session: TelephonySession, item: Any) -> None:
+    session.trace.on_upstream_send()
+    await session.gemini.send_audio_b64_pcm16(item)
+
+
+async def _send_to_client(session: TelephonySession, item: Any) -> None:
+    if session.client_ws.open:
+        await session.client_ws.send(item)
+
+
+# Close handshakes started from task callbacks (referenced so they aren't garbage collected)
+_CLOSING: Set[asyncio.Task] = set()
+
+
+def _hang_up_when_done(session: TelephonySession, stage: str) -> Callable[[asyncio.Task], None]:
+    """Done-callback for a call stage the call cannot continue without (Gemini reader, senders).
+
+    Closing the carrier socket ends handle_client's inbound loop, which then cleans up as usual.
+    Stages cancelled by that cleanup are ignored.
+    """
+
+    def done(task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        exc = task.exception()
+        session.log.info("call_stage_ended", stage=stage, error=str(exc) if exc is not None else None)
+        if session.client_ws.open:
+            closing = asyncio.ensure_future(session.client_ws.close(code=1011, reason=f"{stage} ended"))
+            _CLOSING.add(closing)
+            closing.add_done_callback(_CLOSING.discard)
+
+    return done
+
+
+async def _cancel_tasks(tasks: list) -> None:
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
 
 
 async def handle_client(client_ws, path: str):
@@ -120,10 +380,7 @@ async def handle_client(client_ws, path: str):
 
     # Only accept configured base path (e.g. /ws or /wsNew1)
     if base_path != cfg.WS_PATH:
-        if cfg.DEBUG:
-            print(
-                f"[telephony] ❌ Rejecting connection: path={path!r} base_path={base_path!r} expected={cfg.WS_PATH!r}"
-            )
+        LOG.debug("connection_rejected", path=path, base_path=base_path, expected=cfg.WS_PATH)
         await client_ws.close(code=1008, reason="Invalid path")
         return
 
@@ -134,41 +391,52 @@ async def handle_client(client_ws, path: str):
     )
     audio_processor = AudioProcessor(rates)
 
-    prompt = _read_prompt_text()
-
-    service_url = (
-        "wss://us-central1-aiplatform.googleapis.com/ws/"
-        "google.cloud.aiplatform.v1beta1.LlmBidiService/BidiGenerateContent"
-    )
-    gemini_cfg = GeminiSessionConfig(
-        service_url=service_url,
-        model_uri=cfg.model_uri,
-        voice=cfg.GEMINI_VOICE,
-        system_instructions=prompt,
-        enable_affective_dialog=True,
-        enable_input_transcription=False,
-        enable_output_transcription=False,
-        vad_silence_ms=300,
-        vad_prefix_ms=400,
-        activity_handling="START_OF_ACTIVITY_INTERRUPTS",
-    )
+    gemini_cfg = _current_gemini_config(cfg)
 
     # Create session with temporary ucid until 'start' arrives
     ucid = "UNKNOWN"
+    counted = False
     gemini = GeminiLiveSession(gemini_cfg)
 
     session = TelephonySession(
         ucid=ucid,
         client_ws=client_ws,
         gemini=gemini,
-        input_buffer=[],
-        output_buffer=[],
+        input_buffer=Int16RingBuffer(cfg.AUDIO_RING_SAMPLES_INPUT),
+        output_buffer=Int16RingBuffer(
+            cfg.AUDIO_RING_SAMPLES_OUTPUT,
+            cfg.PLAYOUT_MAX_BUFFER_SAMPLES if cfg.PLAYOUT_PACED else 0,
+        ),
+        uplink=BoundedSendQueue("uplink", cfg.UPLINK_QUEUE_MAX, cfg.UPLINK_QUEUE_POLICY),
+        downlink=BoundedSendQueue("downlink", cfg.DOWNLINK_QUEUE_MAX, cfg.DOWNLINK_QUEUE_POLICY),
+        trace=CallTrace(ucid),
     )
+    framer = AdaptiveUplinkFramer(
+        SpeechDetector(
+            sample_rate=cfg.TELEPHONY_SR,
+            rms_threshold=cfg.SPEECH_RMS_THRESHOLD,
+            zcr_max=cfg.SPEECH_ZCR_MAX,
+            hangover_ms=cfg.UPLINK_HANGOVER_MS,
+        ),
+        idle_samples=cfg.AUDIO_BUFFER_SAMPLES_INPUT,
+        active_samples=cfg.UPLINK_ACTIVE_FRAME_SAMPLES,
+        sample_rate=cfg.TELEPHONY_SR,
+        adaptive=cfg.UPLINK_ADAPTIVE,
+    )
+    gate: Optional[SilenceGate] = None
+    if cfg.UPLINK_SILENCE_SUPPRESSION:
+        gate = SilenceGate(
+            framer.detector,
+            sample_rate=cfg.TELEPHONY_SR,
+            preroll_ms=cfg.UPLINK_PREROLL_MS,
+            keepalive_ms=cfg.UPLINK_KEEPALIVE_MS,
+        )
+    tasks: list = []
 
     try:
         # Wait for start event to get real UCID before connecting upstream
         first = await asyncio.wait_for(client_ws.recv(), timeout=10.0)
-        start_msg = json.loads(first)
+        start_msg = json_loads(first)
         if start_msg.get("event") != "start":
             await client_ws.close(code=1008, reason="Expected start event")
             return
@@ -179,81 +447,373 @@ async def handle_client(client_ws, path: str):
             or start_msg.get("data", {}).get("ucid")
             or "UNKNOWN"
         )
+        session.log = LOG.bind(ucid=session.ucid)
 
-        if cfg.DEBUG:
-            print(f"[{session.ucid}] 🎬 start event received on path={path}")
+        session.transport = _requested(path, start_msg, "transport", TRANSPORT_JSON)
+        if session.transport not in TRANSPORTS:
+            await client_ws.close(code=1008, reason="Unsupported transport")
+            return
+        try:
+            audio_processor.set_encoding(_requested(path, start_msg, "encoding", ENCODING_PCM16))
+        except ValueError:
+            await client_ws.close(code=1008, reason="Unsupported encoding")
+            return
+        if audio_processor.encoding != ENCODING_PCM16 and session.transport == TRANSPORT_JSON:
+            await client_ws.close(code=1008, reason="G.711 needs the base64 or binary transport")
+            return
 
-        # Connect to Gemini
-        await session.gemini.connect()
-        if cfg.DEBUG:
-            print(f"[{session.ucid}] ✅ Connected to Gemini Live")
+        rejected = ADMISSION.check(len(ACTIVE_SESSIONS))
+        if rejected is not None:
+            metrics.CALLS_REJECTED.inc(reason=rejected)
+            session.log.info("call_rejected", reason=rejected, active=len(ACTIVE_SESSIONS))
+            await client_ws.close(code=cfg.ADMISSION_REJECT_CODE, reason=f"Try again later ({rejected})")
+            return
 
-        # Start reader task
-        gemini_task = asyncio.create_task(_gemini_reader(session, audio_processor, cfg))
+        session.trace = CallTrace(session.ucid)
+        CALLS.call_started()
+        counted = True
+        ACTIVE_SESSIONS.add(session)
+        metrics.CALLS_TOTAL.inc()
+        metrics.ACTIVE_CALLS.inc()
+        if RECORDER is not None:
+            session.recording = RECORDER.open(session.ucid)
+        if TRANSCRIPTS is not None:
+            session.transcript = CallTranscript(TRANSCRIPTS, session.ucid)
+        if ENGINE is not None:
+            session.uplink_stream = ENGINE.stream(
+                audio_processor.input_resampler,
+                session.uplink.put_audio,
+                post=AudioProcessor.encode_gemini_b64,
+                stage="uplink_resample_encode",
+            )
+        session.log.debug(
+            "call_start", path=path, transport=session.transport, encoding=audio_processor.encoding
+        )
+
+        # Connect to Gemini (or take an already setupComplete session from the pool)
+        connect_started = time.monotonic()
+        if POOL is not None:
+            hits = POOL.stats.hits
+            session.gemini = await POOL.acquire(gemini_cfg)
+            source = "pool" if POOL.stats.hits > hits else "connect"
+        else:
+            source = "connect"
+            await session.gemini.connect()
+        connect_s = time.monotonic() - connect_started
+        metrics.GEMINI_CONNECT_SECONDS.observe(connect_s, source=source)
+        session.log.debug("gemini_ready", source=source, ms=round(connect_s * 1000))
+        session.gemini.on_reconnect = lambda seconds, outcome: _on_gemini_reconnect(
+            session, cfg, seconds, outcome
+        )
+
+        # Each direction runs as its own stage: readers only enqueue, sender tasks own the sockets.
+        # If any of them stops (upstream gone, send error), the call is over: hang up the carrier.
+        stages = {
+            "gemini_reader": _gemini_reader(session, audio_processor, cfg),
+            "uplink_sender": session.uplink.run_sender(lambda item: _send_to_gemini(session, item)),
+            "downlink_sender": session.downlink.run_sender(lambda item: _send_to_client(session, item)),
+        }
+        for stage, coro in stages.items():
+            task = asyncio.create_task(coro)
+            task.add_done_callback(_hang_up_when_done(session, stage))
+            tasks.append(task)
 
         # Process remaining messages
         async for raw in client_ws:
-            try:
-                msg = json.loads(raw)
-            except json.JSONDecodeError:
-                continue
+            if session.transport == TRANSPORT_BINARY and not isinstance(raw, str):
+                # Binary frames carry raw audio (PCM16 or G.711); events still arrive as JSON text frames
+                msg, samples = _BINARY_MEDIA, audio_processor.decode_payload(raw)
+            else:
+                try:
+                    msg, samples = decode_frame(raw, audio_processor.decode_payload)
+                except ValueError as e:
+                    # e.g. raw audio in a binary frame without the binary transport
+                    session.log.debug(
+                        "frame_undecodable",
+                        transport=session.transport,
+                        binary=not isinstance(raw, str),
+                        error=str(e),
+                    )
+                    continue
 
             event = msg.get("event")
             if event in {"stop", "end", "close"}:
-                if cfg.DEBUG:
-                    print(f"[{session.ucid}] 📞 stop event received")
+                session.log.debug("call_stop_event")
                 break
 
-            if event == "media" and msg.get("data"):
-                samples = msg["data"].get("samples", [])
-                if not samples:
+            if event == "media" and samples is not None:
+                if not samples.size:
                     continue
-
-                session.input_buffer.extend(samples)
-
-                while len(session.input_buffer) >= cfg.AUDIO_BUFFER_SAMPLES_INPUT:
-                    chunk = session.input_buffer[: cfg.AUDIO_BUFFER_SAMPLES_INPUT]
-                    session.input_buffer = session.input_buffer[cfg.AUDIO_BUFFER_SAMPLES_INPUT :]
-
-                    samples_np = audio_processor.waybeo_samples_to_np(chunk)
-                    audio_b64 = audio_processor.process_input_8k_to_gemini_16k_b64(samples_np)
-                    await session.gemini.send_audio_b64_pcm16(audio_b64)
-
-        gemini_task.cancel()
-        try:
-            await gemini_task
-        except asyncio.CancelledError:
-            pass
+                if session.recording is not None:
+                    session.recording.caller(samples)
+
+                session.trace.on_inbound_frame(framer.detector.update(samples))
+                flush = False
+                if gate is not None:
+                    samples, flush = gate.process(samples)
+                if samples is not None:
+                    session.input_buffer.append(samples)
+
+                # Small chunks while the caller speaks, AUDIO_BUFFER_MS_INPUT chunks in silence
+                while True:
+                    n = framer.next_chunk(len(session.input_buffer), flush)
+                    if not n:
+                        break
+                    flush = False
+                    chunk = session.input_buffer.read(n)
+                    if session.uplink_stream is not None:
+                        session.uplink_stream.submit(chunk)
+                        continue
+                    t0 = time.perf_counter()
+                    audio_b64 = audio_processor.process_input_8k_to_gemini_16k_b64(chunk)
+                    metrics.FRAME_SECONDS.observe(time.perf_counter() - t0, stage="uplink_resample_encode")
+                    session.uplink.put_audio(audio_b64)
 
     except asyncio.TimeoutError:
         await client_ws.close(code=1008, reason="Timeout waiting for start event")
     except ConnectionClosed:
         pass
     except Exception as e:
-        if cfg.DEBUG:
-            print(f"[{session.ucid}] ❌ Telephony handler error: {e}")
+        session.log.error("handler_error", error=str(e))
     finally:
+        await _cancel_tasks(tasks)
+        if session.uplink_stream is not None:
+            session.uplink_stream.close()
+        if session.recording is not None:
+            session.recording.close()
+        if session.transcript is not None:
+            session.transcript.close()
+        if counted:
+            CALLS.call_ended()
+            ACTIVE_SESSIONS.discard(session)
+            metrics.ACTIVE_CALLS.dec()
+            metrics.QUEUE_DROPPED.inc(session.uplink.stats.dropped, direction="uplink")
+            metrics.QUEUE_DROPPED.inc(session.downlink.stats.dropped, direction="downlink")
+            metrics.AUDIO_OVERFLOW_SAMPLES.inc(session.input_buffer.overflow_samples, direction="uplink")
+            metrics.AUDIO_OVERFLOW_SAMPLES.inc(session.output_buffer.overflow_samples, direction="downlink")
+            if TRACE_WRITER is not None:
+                try:
+                    TRACE_WRITER.write(
+                        session.trace.summary(
+                            uplink_dropped=session.uplink.stats.dropped,
+                            downlink_dropped=session.downlink.stats.dropped,
+                            uplink_framing=framer.summary(),
+                            uplink_silence=gate.summary() if gate is not None else None,
+                            gemini_reconnects=session.gemini.reconnects,
+                            gemini_reconnect_failures=session.gemini.reconnect_failures,
+                            playout=session.playout.summary() if session.playout is not None else None,
+                            recording=session.recording.summary() if session.recording is not None else None,
+                            transcript=session.transcript.summary() if session.transcript is not None else None,
+                        )
+                    )
+                except Exception as e:
+                    session.log.error("call_trace_write_failed", error=str(e))
+            if session.log.enabled(logging.DEBUG):
+                session.log.debug(
+                    "call_end",
+                    uplink_queue=str(session.uplink.stats),
+                    downlink_queue=str(session.downlink.stats),
+                    uplink_framing=framer.summary(),
+                    uplink_silence=gate.summary() if gate is not None else None,
+                    playout=session.playout.summary() if session.playout is not None else None,
+                    recording=session.recording.summary() if session.recording is not None else None,
+                    transcript=session.transcript.summary() if session.transcript is not None else None,
+                )
         try:
             await session.gemini.close()
         except Exception:
             pass
 
 
-async def main() -> None:
+async def main(worker_id: Optional[int] = None) -> None:
     cfg = Config()
     Config.validate(cfg)
-    cfg.print_config()
+    if worker_id is None:
+        cfg.print_config()
+    _configure_logging(cfg)
+
+    # Warm the shared OAuth token before accepting calls; refreshes then happen in the background.
+    token_cache = get_token_cache()
+    token_cache.on_refresh = _on_token_refresh
+    if cfg.GEMINI_ACCESS_TOKEN:
+        token_cache.use_static_token(cfg.GEMINI_ACCESS_TOKEN)
+        LOG.info("token_static")
+    else:
+        try:
+            await token_cache.refresh()
+            LOG.info("token_cached")
+        except Exception as e:
+            LOG.warning("token_fetch_failed", error=str(e), retry="background")
+        token_cache.start()
+
+    global ENGINE, POOL, RECORDER, TRACE_WRITER, TRANSCRIPTS
+    if cfg.CALL_TRACE_FILE:
+        trace_file = cfg.CALL_TRACE_FILE
+        if worker_id is not None:
+            # One file per worker: RotatingFileHandler is not multi-process safe.
+            root, ext = os.path.splitext(trace_file)
+            trace_file = f"{root}.w{worker_id}{ext}"
+        TRACE_WRITER = TraceWriter(trace_file, cfg.CALL_TRACE_MAX_BYTES, cfg.CALL_TRACE_BACKUPS)
+
+    if cfg.RECORDING_DIR:
+        RECORDER = CallRecorder(
+            cfg.RECORDING_DIR,
+            sample_rate=cfg.TELEPHONY_SR,
+            max_queue_frames=cfg.RECORDING_QUEUE_MAX_FRAMES,
+            flush_s=cfg.RECORDING_FLUSH_S,
+        )
+        RECORDER.start()
+
+    if cfg.TRANSCRIPTION_ENABLED:
+        TRANSCRIPTS = TranscriptSink(
+            cfg.TRANSCRIPT_DB,
+            flush_rows=cfg.TRANSCRIPT_FLUSH_ROWS,
+            flush_ms=cfg.TRANSCRIPT_FLUSH_MS,
+            max_pending=cfg.TRANSCRIPT_MAX_PENDING,
+        )
+        await TRANSCRIPTS.start()
+
+    if cfg.AUDIO_ENGINE_TICK_MS > 0:
+        ENGINE = AudioEngine(cfg.AUDIO_ENGINE_TICK_MS, use_thread=cfg.AUDIO_ENGINE_THREAD)
+        ENGINE.start()
+
+    if cfg.GEMINI_POOL_SIZE > 0:
+        POOL = GeminiSessionPool(
+            target_size=cfg.GEMINI_POOL_SIZE,
+            idle_ttl_s=cfg.GEMINI_POOL_IDLE_TTL_S,
+            health_interval_s=cfg.GEMINI_POOL_HEALTH_INTERVAL_S,
+        )
+        POOL.register(_current_gemini_config(cfg))
+        POOL.start()
+
+    ADMISSION.max_calls = cfg.MAX_CONCURRENT_CALLS
+    ADMISSION.max_loop_lag_s = cfg.ADMISSION_MAX_LOOP_LAG_MS / 1000.0
+    if cfg.METRICS_PORT > 0 or ADMISSION.max_loop_lag_s:
+        _start_lag_monitor()
+
+    if cfg.METRICS_PORT > 0:
+        metrics.QUEUE_DEPTH.set_function(lambda: _queue_depth_metrics(sum))
+        metrics.QUEUE_MAX_DEPTH.set_function(lambda: _queue_depth_metrics(max))
+        metrics.TOKEN_REFRESH_FAILURES.set_function(
+            lambda: {(): float(token_cache.stats.refresh_failures)}
+        )
+        metrics.POOL_IDLE_SESSIONS.set_function(
+            lambda: {(): float(POOL.idle_count() if POOL is not None else 0)}
+        )
+        metrics_port = cfg.METRICS_PORT + (worker_id or 0)
+        await metrics.start_metrics_server(cfg.HOST, metrics_port)
+        LOG.info("metrics_listening", url=f"http://{cfg.HOST}:{metrics_port}/metrics", worker=worker_id)
 
     # websockets.serve passes (websocket, path) for the legacy API; handler accepts both.
-    async with websockets.serve(handle_client, cfg.HOST, cfg.PORT):
-        print(f"✅ Telephony WS listening on ws://{cfg.HOST}:{cfg.PORT}{cfg.WS_PATH}")
-        await asyncio.Future()
+    # With WORKERS > 1 every worker binds the same port; SO_REUSEPORT lets the kernel balance calls.
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    async with websockets.serve(
+        handle_client, cfg.HOST, cfg.PORT, reuse_port=cfg.WORKERS > 1
+    ) as server:
+        LOG.info("listening", url=f"ws://{cfg.HOST}:{cfg.PORT}{cfg.WS_PATH}", worker=worker_id)
+        await stop.wait()
+        await _drain(server, cfg, worker_id)
 
 
-if __name__ == "__main__":
+def _start_lag_monitor() -> None:
+    global LAG_MONITOR
+    LAG_MONITOR = asyncio.create_task(metrics.monitor_event_loop_lag(on_lag=ADMISSION.observe_loop_lag))
+    LAG_MONITOR.add_done_callback(_on_lag_monitor_done)
+
+
+def _on_lag_monitor_done(task: asyncio.Task) -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    # Without it admission control stops shedding load on lag: say so, and start it again.
+    LOG.error(
+        "lag_monitor_failed",
+        exc_info=(type(exc), exc, exc.__traceback__) if exc is not None else None,
+        error=str(exc),
+    )
+    if not ADMISSION.draining:
+        _start_lag_monitor()
+
+
+async def _drain(server, cfg: Config, worker_id: Optional[int]) -> None:
+    """Stop accepting calls, let in-flight calls finish (up to DRAIN_TIMEOUT_S), then return."""
+    ADMISSION.draining = True
+    server.close(close_connections=False)  # stop listening; keep established calls
+    LOG.info("draining", calls=len(ACTIVE_SESSIONS), timeout_s=cfg.DRAIN_TIMEOUT_S, worker=worker_id)
+    deadline = time.monotonic() + cfg.DRAIN_TIMEOUT_S
+    while ACTIVE_SESSIONS and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+    if ACTIVE_SESSIONS:
+        LOG.warning("drain_timeout", calls=len(ACTIVE_SESSIONS), worker=worker_id)
+    if LAG_MONITOR is not None:
+        LAG_MONITOR.cancel()
+    if POOL is not None:
+        await POOL.close()
+    if RECORDER is not None:
+        # Joins the writer thread after it finalizes every WAV; keep the loop free meanwhile.
+        await asyncio.get_running_loop().run_in_executor(None, RECORDER.stop)
+    if ENGINE is not None:
+        LOG.info("audio_engine_stopped", worker=worker_id, **ENGINE.summary())
+        ENGINE.close()
+    if TRACE_WRITER is not None:
+        # Joins the writer thread after the last queued trace line is on disk.
+        await asyncio.get_running_loop().run_in_executor(None, TRACE_WRITER.close)
+    if TRANSCRIPTS is not None:
+        await TRANSCRIPTS.close()
+        LOG.info("transcripts_closed", worker=worker_id, **TRANSCRIPTS.summary())
+    LOG.info(
+        "drained",
+        worker=worker_id,
+        log_records_dropped=dropped_records(),
+        trace_lines_dropped=TRACE_WRITER.dropped if TRACE_WRITER is not None else 0,
+    )
+
+
+def _configure_logging(cfg: Config) -> None:
+    configure_logging(
+        level=cfg.LOG_LEVEL,
+        rate_per_event=cfg.LOG_RATE_PER_EVENT,
+        event_rates=parse_event_rates(cfg.LOG_EVENT_RATES),
+        max_field_chars=cfg.LOG_MAX_FIELD_CHARS,
+        queue_max=cfg.LOG_QUEUE_MAX,
+    )
+
+
+def _run_worker(counters: CallCounters) -> None:
+    global CALLS
+    CALLS = counters
     try:
-        asyncio.run(main())
+        asyncio.run(main(worker_id=counters.worker_id))
     except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    cfg = Config()
+    if cfg.WORKERS > 1:
+        Config.validate(cfg)
+        cfg.print_config()
+        # Supervisor events go through the same JSON logger; each worker reconfigures it after fork.
+        _configure_logging(cfg)
+        try:
+            Supervisor(
+                cfg.WORKERS,
+                _run_worker,
+                stats_interval_s=cfg.WORKER_STATS_INTERVAL_S,
+                shutdown_timeout_s=cfg.DRAIN_TIMEOUT_S + 10.0,
+            ).run()
+        finally:
+            shutdown_logging()
         print("\n👋 Telephony service stopped")
+    else:
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            print("\n👋 Telephony service stopped")
+        finally:
+            shutdown_logging()
 
 
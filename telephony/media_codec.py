@@ -0,0 +1,197 @@
+"""
+Fast-path codec for Waybeo media frames.
+
+Inbound `media` frames are mostly one big `data.samples` array of decimal ints. Instead of parsing it
+into a Python list and then copying it into NumPy, `decode_frame()` cuts the array text out of the
+frame, parses it straight into int16 with NumPy, and only JSON-parses the small remaining header.
+
+Outbound frames are built from a per-call prebuilt header template plus a fast int-array formatter,
+so no dict is built and no generic `json.dumps` runs per chunk.
+
+Besides the default JSON sample arrays, a call can negotiate a compact audio transport:
+- "base64": media frames carry `data.payload` (base64 audio bytes) instead of `data.samples`
+- "binary": audio travels as raw binary websocket frames; text frames stay JSON events
+Audio bytes are PCM16 LE unless the call negotiated G.711 (the caller passes the payload codec).
+Inbound JSON frames may carry either `data.samples` or `data.payload` whatever the transport; raw
+binary audio frames are only recognised on the "binary" transport (elsewhere a binary websocket frame
+is parsed as JSON text). The negotiated transport picks the outbound form.
+
+`orjson` is used when installed (`pip install orjson`); otherwise we fall back to the stdlib.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+try:
+    import orjson as _orjson
+except ImportError:  # optional fast backend
+    _orjson = None
+
+TRANSPORT_JSON = "json"
+TRANSPORT_BASE64 = "base64"
+TRANSPORT_BINARY = "binary"
+TRANSPORTS = (TRANSPORT_JSON, TRANSPORT_BASE64, TRANSPORT_BINARY)
+
+_SAMPLES_KEY = '"samples"'
+_EMPTY = np.zeros(0, dtype=np.int16)
+
+Raw = Union[str, bytes, bytearray, memoryview]
+
+
+def json_backend() -> str:
+    return "orjson" if _orjson is not None else "json"
+
+
+def loads(raw: Raw) -> Any:
+    if _orjson is not None:
+        return _orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dumps(obj: Any) -> str:
+    if _orjson is not None:
+        return _orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+@lru_cache(maxsize=1)
+def _int16_text_table() -> Tuple[np.ndarray, np.ndarray]:
+    # Row i holds the ASCII text of (i - 32768) followed by ",", left-aligned in 7 bytes.
+    text = [f"{v}," for v in range(-32768, 32768)]
+    lengths = np.array([len(t) for t in text], dtype=np.int8)
+    table = np.frombuffer("".join(t.ljust(7) for t in text).encode("ascii"), dtype=np.uint8)
+    return table.reshape(65536, 7), lengths
+
+
+def format_int_array(samples: np.ndarray) -> str:
+    """Comma-separated decimal ints (no brackets)."""
+    if samples.size == 0:
+        return ""
+    if _orjson is not None:
+        return _orjson.dumps(
+            np.ascontiguousarray(samples, dtype=np.int16), option=_orjson.OPT_SERIALIZE_NUMPY
+        )[1:-1].decode("ascii")
+    # Stdlib fallback without per-sample Python work: gather each sample's text from a lookup
+    # table, then keep only the used bytes of every row.
+    table, lengths = _int16_text_table()
+    idx = samples.astype(np.int32) + 32768
+    used = lengths[idx][:, None] > np.arange(7, dtype=np.int8)
+    return table[idx][used].tobytes()[:-1].decode("ascii")
+
+
+def _to_int16(values: np.ndarray) -> np.ndarray:
+    """Sample values as parsed (float64) -> int16: rounded, and clipped to the int16 range."""
+    return np.clip(np.rint(values), -32768, 32767).astype(np.int16)
+
+
+def _parse_int_array(body: str) -> Optional[np.ndarray]:
+    if not body or body.isspace():
+        return _EMPTY
+    # Parse as int64, not int16: NumPy would wrap out-of-range values (40000 -> -25536). The int64
+    # parser only takes plain integers, so floats, quoted numbers, nan etc. fail here and go to the
+    # slow path; either way the values get the same rounding and clipping. (float64 would accept them
+    # too, but parses ~3x slower.)
+    if "+" in body:  # "+5" parses here but is not JSON
+        return None
+    try:
+        values = np.fromstring(body, dtype=np.int64, sep=",")
+    except ValueError:  # NumPy >= 2 raises on unparseable text
+        return None
+    # Older NumPy stops (with a warning) at anything it cannot parse; verify the count.
+    if values.size != body.count(",") + 1:
+        return None
+    return _to_int16(values)
+
+
+def decode_pcm16(raw: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Raw little-endian PCM16 (a binary websocket frame) -> int16 samples; a trailing odd byte is ignored."""
+    n = len(raw) // 2
+    return np.frombuffer(raw, dtype="<i2", count=n).astype(np.int16, copy=False)
+
+
+def _encode_pcm16(samples: np.ndarray) -> bytes:
+    return np.ascontiguousarray(samples, dtype="<i2").tobytes()
+
+
+def decode_frame(
+    raw: Raw, decode_payload: Callable[[bytes], np.ndarray] = decode_pcm16
+) -> Tuple[Dict[str, Any], Optional[np.ndarray]]:
+    """Parse a Waybeo frame into (message, samples).
+
+    `samples` is an int16 array when the frame has `data.samples` (or a base64 `data.payload`,
+    decoded with `decode_payload`), else None. In the returned
+    message `data.samples` is left as an empty list so the sample text is never boxed into ints.
+    Raises ValueError (json.JSONDecodeError) for malformed frames.
+    """
+    if not isinstance(raw, str):
+        raw = bytes(raw).decode("utf-8")
+
+    key = raw.find(_SAMPLES_KEY)
+    if key >= 0:
+        lb = raw.find("[", key)
+        rb = raw.find("]", lb)
+        if lb >= 0 and rb >= 0 and raw[key + len(_SAMPLES_KEY) : lb].strip() == ":":
+            samples = _parse_int_array(raw[lb + 1 : rb])
+            if samples is not None:
+                msg = loads(raw[: lb + 1] + raw[rb:])
+                return msg, samples
+
+    # Slow path: unusual formatting, non-int samples or no samples at all.
+    msg = loads(raw)
+    data = msg.get("data") if isinstance(msg, dict) else None
+    if isinstance(data, dict) and isinstance(data.get("payload"), str):
+        try:
+            pcm = base64.b64decode(data["payload"], validate=True)
+        except (binascii.Error, ValueError) as e:
+            raise ValueError(f"invalid base64 payload: {e}") from e
+        data["payload"] = ""
+        return msg, decode_payload(pcm)
+    if isinstance(data, dict) and "samples" in data:
+        samples = np.asarray(data["samples"] or [], dtype=np.float64)
+        data["samples"] = []
+        return msg, _to_int16(samples)
+    return msg, None
+
+
+class MediaFrameEncoder:
+    """Serializes outbound `media` frames for one call from a prebuilt template."""
+
+    def __init__(
+        self,
+        ucid: str,
+        sample_rate: int,
+        transport: str = TRANSPORT_JSON,
+        encode_payload: Optional[Callable[[np.ndarray], bytes]] = None,
+        encoding: str = "pcm16",
+    ):
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Unknown audio transport {transport!r} (expected one of {TRANSPORTS})")
+        if transport == TRANSPORT_JSON and encoding != "pcm16":
+            raise ValueError("JSON sample arrays carry PCM16 only")
+        self.transport = transport
+        self._encode_payload = encode_payload or _encode_pcm16
+        if transport == TRANSPORT_BASE64:
+            field, open_, close = '"payload":', '"', '"'
+        else:
+            field, open_, close = '"samples":', "[", "]"
+        self._prefix = '{"event":"media","type":"media","ucid":' + json.dumps(ucid) + ',"data":{' + field + open_
+        self._suffix = close + ',"bitsPerSample":%d,' % (16 if encoding == "pcm16" else 8)
+        if encoding != "pcm16":
+            self._suffix += '"encoding":%s,' % json.dumps(encoding)
+        self._suffix += '"sampleRate":%d,"channelCount":1,"numberOfFrames":' % sample_rate
+
+    def encode(self, samples: np.ndarray) -> Union[str, bytes]:
+        if self.transport == TRANSPORT_BINARY:
+            return self._encode_payload(samples)
+        if self.transport == TRANSPORT_BASE64:
+            body = base64.b64encode(self._encode_payload(samples)).decode("ascii")
+        else:
+            body = format_int_array(samples)
+        return self._prefix + body + self._suffix + str(samples.size) + ',"type":"data"}}'
@@ -0,0 +1,274 @@
+"""
+Minimal Prometheus metrics for the telephony service (no extra dependency).
+
+Metrics are plain in-process objects updated from the event loop; `start_metrics_server()` serves
+them in the Prometheus text exposition format on `GET /metrics` using a tiny asyncio HTTP server
+that runs next to the `websockets.serve` listener.
+
+With `WORKERS > 1`, worker N serves on `METRICS_PORT + N` (each worker has its own loop and state).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Latency buckets in seconds, tuned for per-frame work (us..ms) and network/turn latency (ms..s)
+FRAME_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
+LATENCY_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _fmt_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for key, v in self._values.items():
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}"
+
+
+class Gauge(_Metric):
+    """Gauge set directly, or computed at scrape time from a callback returning {labels: value}."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        doc: str,
+        labelnames: Sequence[str] = (),
+        fn: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, doc, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._fn = fn
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def set_function(self, fn: Callable[[], Dict[LabelValues, float]]) -> None:
+        self._fn = fn
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[str]:
+        values = self._fn() if self._fn is not None else self._values
+        for key, v in values.items():
+            yield f"{self.name}{_fmt_labels(self.labelnames, key)} {_fmt_value(v)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[key] += value
+
+    def samples(self) -> Iterable[str]:
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, c in zip(self.buckets + (math.inf,), counts):
+                cumulative += c
+                le = f'le="{_fmt_value(bound)}"'
+                yield f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(self._sums[key])}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, doc: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, doc, labelnames))  # type: ignore[return-value]
+
+
+def gauge(
+    name: str,
+    doc: str,
+    labelnames: Sequence[str] = (),
+    fn: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+) -> Gauge:
+    return REGISTRY.register(Gauge(name, doc, labelnames, fn))  # type: ignore[return-value]
+
+
+def histogram(name: str, doc: str, buckets: Sequence[float], labelnames: Sequence[str] = ()) -> Histogram:
+    return REGISTRY.register(Histogram(name, doc, buckets, labelnames))  # type: ignore[return-value]
+
+
+# ---- telephony metrics ----
+ACTIVE_CALLS = gauge("telephony_active_calls", "Calls currently in progress")
+CALLS_TOTAL = counter("telephony_calls_total", "Calls accepted (start event received)")
+CALLS_REJECTED = counter(
+    "telephony_calls_rejected_total", "Calls refused at the start event by admission control", ("reason",)
+)
+GEMINI_CONNECT_SECONDS = histogram(
+    "telephony_gemini_connect_seconds",
+    "Time from start event until the Gemini session is usable",
+    LATENCY_BUCKETS,
+    labelnames=("source",),
+)
+FRAME_SECONDS = histogram(
+    "telephony_frame_processing_seconds",
+    "Per-frame audio processing time (resample + encode/decode)",
+    FRAME_BUCKETS,
+    labelnames=("stage",),
+)
+TURN_LATENCY_SECONDS = histogram(
+    "telephony_turn_latency_seconds",
+    "Caller end of speech to first outbound audio frame of the model turn",
+    LATENCY_BUCKETS,
+)
+EVENT_LOOP_LAG_SECONDS = histogram(
+    "telephony_event_loop_lag_seconds", "Event loop scheduling delay", LOOP_LAG_BUCKETS
+)
+GEMINI_RECONNECT_SECONDS = histogram(
+    "telephony_gemini_reconnect_seconds",
+    "Upstream drop until audio flows again (outcome: resumed / fresh / failed)",
+    LATENCY_BUCKETS,
+    labelnames=("outcome",),
+)
+QUEUE_DEPTH = gauge(
+    "telephony_queue_depth", "Items waiting in per-call send queues (sum over calls)", ("direction",)
+)
+QUEUE_MAX_DEPTH = gauge(
+    "telephony_queue_max_depth", "Deepest per-call send queue among active calls", ("direction",)
+)
+QUEUE_DROPPED = counter(
+    "telephony_queue_dropped_total", "Audio items dropped by per-call send queues", ("direction",)
+)
+AUDIO_OVERFLOW_SAMPLES = counter(
+    "telephony_audio_overflow_samples_total",
+    "Samples discarded because a per-call ring buffer was full",
+    ("direction",),
+)
+
+TOKEN_REFRESH_SECONDS = histogram(
+    "telephony_token_refresh_seconds",
+    "OAuth access token refresh round trip (outcome: ok / failed)",
+    LATENCY_BUCKETS,
+    labelnames=("outcome",),
+)
+TOKEN_REFRESH_FAILURES = gauge(
+    "telephony_token_refresh_failures", "Failed OAuth token refreshes since start"
+)
+POOL_IDLE_SESSIONS = gauge("telephony_gemini_pool_idle_sessions", "Pre-warmed Gemini sessions ready")
+
+
+async def monitor_event_loop_lag(
+    interval_s: float = 0.25, on_lag: Optional[Callable[[float], None]] = None
+) -> None:
+    """Sleep `interval_s` repeatedly and record how late the loop woke us up."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval_s)
+        lag = max(0.0, loop.time() - start - interval_s)
+        EVENT_LOOP_LAG_SECONDS.observe(lag)
+        if on_lag is not None:
+            on_lag(lag)
+
+
+async def _handle_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+        # Drain headers; we don't need them.
+        while True:
+            line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            if not line or line in (b"\r\n", b"\n"):
+                break
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?", 1)[0] == "/metrics":
+            body = REGISTRY.render().encode("utf-8")
+            status = "200 OK"
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body, status, ctype = b"Not found\n", "404 Not Found", "text/plain"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1")
+            + body
+        )
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int) -> asyncio.AbstractServer:
+    return await asyncio.start_server(_handle_http, host, port)
+
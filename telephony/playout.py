@@ -0,0 +1,134 @@
+"""
+Real-time paced playout of model audio towards the telephony carrier.
+
+Gemini produces audio faster than real time. Sending it as fast as it arrives just moves seconds of
+speech into the carrier's jitter buffer, where a barge-in can no longer recall it. `PlayoutScheduler`
+keeps the audio in our own ring buffer instead and releases fixed-size frames (20/40ms) on a
+real-time clock, keeping at most `lead_ms` of audio in flight at the carrier. On `interrupt()`
+everything not yet sent is dropped, so at most one frame + lead is heard after a barge-in.
+
+The buffer must hold a whole turn: give it a `max_capacity` so it grows rather than overwriting
+unplayed audio (`overflow_samples` in `summary()` counts anything lost beyond that cap).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+import numpy as np
+
+from ring_buffer import Int16RingBuffer
+
+# The frame is a view into the ring buffer: it must be consumed (encoded) before the first await.
+SendFrame = Callable[[np.ndarray], Awaitable[None]]
+
+
+@dataclass
+class PlayoutStats:
+    frames_sent: int = 0
+    samples_sent: int = 0
+    samples_dropped: int = 0  # discarded by interrupt() before being sent
+    interrupts: int = 0
+
+
+class PlayoutScheduler:
+    def __init__(
+        self,
+        buffer: Int16RingBuffer,
+        send: SendFrame,
+        sample_rate: int,
+        frame_ms: int = 20,
+        lead_ms: int = 60,
+    ):
+        self.buffer = buffer
+        self.send = send
+        self.sample_rate = sample_rate
+        self.frame_samples = max(1, int(sample_rate * frame_ms / 1000))
+        self.frame_s = self.frame_samples / sample_rate
+        self.lead_s = lead_ms / 1000.0
+        self.stats = PlayoutStats()
+
+        self._wakeup = asyncio.Event()
+        # Monotonic time at which everything sent so far will have finished playing at the far end.
+        self._play_end = 0.0
+
+    # ---- producer side ----
+    def enqueue(self, samples: np.ndarray) -> None:
+        if samples.size:
+            self.buffer.append(samples)
+            self._wakeup.set()
+
+    def interrupt(self) -> int:
+        """Barge-in: drop all audio not yet sent. Returns the number of samples dropped."""
+        dropped = len(self.buffer)
+        self.buffer.clear()
+        self.stats.samples_dropped += dropped
+        self.stats.interrupts += 1
+        self.buffer.shrink()
+        return dropped
+
+    # ---- accounting ----
+    def queued_at_carrier_s(self, now: float | None = None) -> float:
+        """Audio sent but (by our clock) not yet played by the far end."""
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._play_end - now)
+
+    @property
+    def samples_played(self) -> int:
+        queued = int(self.queued_at_carrier_s() * self.sample_rate)
+        return max(0, self.stats.samples_sent - queued)
+
+    @property
+    def samples_pending(self) -> int:
+        """Audio buffered locally, not yet sent."""
+        return len(self.buffer)
+
+    def summary(self) -> Dict[str, Any]:
+        st = self.stats
+        return {
+            "frames_sent": st.frames_sent,
+            "samples_sent": st.samples_sent,
+            "samples_played": self.samples_played,
+            "samples_pending": self.samples_pending,
+            "samples_dropped": st.samples_dropped,
+            "overflow_samples": self.buffer.overflow_samples,
+            "interrupts": st.interrupts,
+        }
+
+    # ---- consumer side ----
+    async def _wait_for_audio(self, timeout: float | None) -> bool:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self) -> None:
+        while True:
+            if not len(self.buffer):
+                self.buffer.shrink()  # turn played out: give back what a long answer needed
+                await self._wait_for_audio(None)
+                continue
+
+            if len(self.buffer) < self.frame_samples:
+                # Tail of a turn (or model is slow): give it one frame time to fill, then flush.
+                if await self._wait_for_audio(self.frame_s):
+                    continue
+
+            now = time.monotonic()
+            ahead = self._play_end - now
+            if ahead > self.lead_s:
+                await asyncio.sleep(ahead - self.lead_s)
+                continue  # re-check: an interrupt may have emptied the buffer meanwhile
+
+            frame = self.buffer.read(self.frame_samples)
+            if not frame.size:
+                continue
+            self._play_end = max(now, self._play_end) + frame.size / self.sample_rate
+            self.stats.frames_sent += 1
+            self.stats.samples_sent += frame.size
+            await self.send(frame)
@@ -0,0 +1,56 @@
+"""
+Cached system prompt with hot reload.
+
+`PromptCache.text()` returns the prompt from memory. At most once per `check_interval_s` it stats
+`PROMPT_FILE`; when the mtime (or size) changes the file is re-read, so prompt edits go live on the
+next call without a restart and without per-call file I/O.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from typing import Optional, Tuple
+
+DEFAULT_PROMPT = "You are a helpful Kia Motors sales assistant. Be concise and friendly."
+
+
+class PromptCache:
+    def __init__(self, path: str, fallback: str = DEFAULT_PROMPT, check_interval_s: float = 1.0):
+        self.path = path
+        self.fallback = fallback
+        self.check_interval_s = check_interval_s
+        # Bumped on every successful (re)load; lets callers cache things derived from the text.
+        self.version = 0
+
+        self._text: Optional[str] = None
+        self._stamp: Optional[Tuple[float, int]] = None
+        self._next_check = 0.0
+
+    def _stat(self) -> Optional[Tuple[float, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime, st.st_size)
+
+    def _load(self, stamp: Optional[Tuple[float, int]]) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except Exception:
+            # fallback: minimal prompt if file missing; keep the last good prompt if we had one
+            text = self._text if self._text is not None else self.fallback
+        if text != self._text:
+            self._text = text
+            self.version += 1
+        self._stamp = stamp
+
+    def text(self) -> str:
+        now = time.monotonic()
+        if self._text is None or now >= self._next_check:
+            self._next_check = now + self.check_interval_s
+            stamp = self._stat()
+            if self._text is None or stamp != self._stamp:
+                self._load(stamp)
+        return self._text  # type: ignore[return-value]
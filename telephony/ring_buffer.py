@@ -0,0 +1,110 @@
+"""
+Fixed-size int16 ring buffer for per-call telephony audio queues.
+
+The storage is "mirrored": every sample is written at `i` and at `i + capacity`, so any run of up to
+`capacity` queued samples is contiguous in memory and `read()` can hand out a NumPy view instead of
+copying. Memory per buffer is 2 * capacity * 2 bytes and `clear()` is O(1), which is what barge-in
+needs.
+
+With `max_capacity` above `capacity` the buffer grows (doubling, up to `max_capacity`) instead of
+dropping its oldest samples, and `shrink()` returns it to the initial size once it is empty. The
+playout buffer uses this: a whole model turn arrives faster than real time and none of it may be lost.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class Int16RingBuffer:
+    def __init__(self, capacity: int, max_capacity: int = 0):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = capacity
+        self.initial_capacity = capacity
+        self.max_capacity = max(capacity, max_capacity)
+        self._buf = np.zeros(capacity * 2, dtype=np.int16)
+        self._read = 0  # index of oldest queued sample, always < capacity
+        self._size = 0
+        # Samples discarded because the buffer was full (oldest audio is dropped first).
+        self.overflow_samples = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self._size
+
+    def clear(self) -> None:
+        self._read = 0
+        self._size = 0
+
+    def _resize(self, capacity: int) -> None:
+        # Views handed out by read() keep referencing the old storage, so they stay valid.
+        queued = self.peek(self._size).copy()
+        self.capacity = capacity
+        self._buf = np.zeros(capacity * 2, dtype=np.int16)
+        self._read = 0
+        self._size = 0
+        self._store(0, queued)
+        self._size = queued.size
+
+    def shrink(self) -> None:
+        """Return a grown buffer to its initial capacity (only while empty)."""
+        if self._size == 0 and self.capacity > self.initial_capacity:
+            self._resize(self.initial_capacity)
+
+    def _store(self, start: int, samples: np.ndarray) -> None:
+        # Write `samples` (len <= capacity) at ring position `start` into both mirrors.
+        cap = self.capacity
+        n = samples.size
+        first = min(n, cap - start)
+        self._buf[start : start + first] = samples[:first]
+        self._buf[start + cap : start + cap + first] = samples[:first]
+        if first < n:
+            rest = n - first
+            self._buf[:rest] = samples[first:]
+            self._buf[cap : cap + rest] = samples[first:]
+
+    def append(self, samples: np.ndarray) -> int:
+        """Queue samples; if full, the oldest samples are dropped. Returns the number dropped."""
+        n = samples.size
+        if n == 0:
+            return 0
+        dropped = 0
+        need = self._size + n
+        if need > self.capacity and self.capacity < self.max_capacity:
+            self._resize(min(self.max_capacity, max(need, 2 * self.capacity)))
+        if n > self.capacity:
+            dropped += n - self.capacity
+            samples = samples[-self.capacity :]
+            n = self.capacity
+        overflow = max(0, self._size + n - self.capacity)
+        if overflow:
+            self._read = (self._read + overflow) % self.capacity
+            self._size -= overflow
+            dropped += overflow
+        self._store((self._read + self._size) % self.capacity, samples)
+        self._size += n
+        self.overflow_samples += dropped
+        return dropped
+
+    def peek(self, n: int) -> np.ndarray:
+        """Zero-copy view of the oldest `n` queued samples (n is clamped to what is queued)."""
+        n = min(n, self._size)
+        return self._buf[self._read : self._read + n]
+
+    def read(self, n: int) -> np.ndarray:
+        """Dequeue up to `n` samples and return them as a zero-copy view.
+
+        The view aliases ring storage: consume it (send/encode/copy) before the next `append()`.
+        """
+        view = self.peek(n)
+        self.skip(view.size)
+        return view
+
+    def skip(self, n: int) -> None:
+        n = min(n, self._size)
+        self._read = (self._read + n) % self.capacity
+        self._size -= n
@@ -0,0 +1,93 @@
+"""
+Bounded per-direction send queues for a call.
+
+Each direction (Waybeo -> Gemini "uplink", Gemini -> Waybeo "downlink") gets its own queue and sender
+task, so a slow socket on one side never stalls reading from the other. Items are bounded and
+dropped by policy when the consumer can't keep up.
+
+Policies on overflow:
+- "drop_oldest": discard the oldest queued item (keeps latency bounded; default)
+- "drop_newest": discard the incoming item
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+POLICIES = (DROP_OLDEST, DROP_NEWEST)
+
+
+@dataclass
+class SendQueueStats:
+    enqueued: int = 0
+    sent: int = 0
+    dropped: int = 0
+    max_depth: int = 0
+    send_errors: int = 0
+
+
+class BoundedSendQueue:
+    def __init__(self, name: str, max_audio: int, policy: str = DROP_OLDEST):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r} (expected one of {POLICIES})")
+        self.name = name
+        self.max_audio = max_audio
+        self.policy = policy
+        self.stats = SendQueueStats()
+
+        self._items: Deque[Any] = deque()
+        self._ready = asyncio.Event()
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def _push(self, item: Any) -> None:
+        self._items.append(item)
+        self.stats.enqueued += 1
+        self.stats.max_depth = max(self.stats.max_depth, len(self._items))
+        self._ready.set()
+
+    def put_audio(self, item: Any) -> bool:
+        """Queue an audio item without blocking. Returns False if something was dropped."""
+        if len(self._items) < self.max_audio:
+            self._push(item)
+            return True
+        self.stats.dropped += 1
+        if self.policy == DROP_NEWEST:
+            return False
+        self._items.popleft()
+        self._push(item)
+        return False
+
+    def clear_audio(self) -> int:
+        """Drop all queued audio. Returns the number dropped."""
+        dropped = len(self._items)
+        if dropped:
+            self._items.clear()
+            self.stats.dropped += dropped
+        return dropped
+
+    async def get(self) -> Any:
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._items.popleft()
+
+    async def run_sender(self, send: Callable[[Any], Awaitable[None]]) -> None:
+        """Consume the queue until `send` raises, awaiting `send(item)` for each item."""
+        while True:
+            item = await self.get()
+            try:
+                await send(item)
+                self.stats.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.stats.send_errors += 1
+                raise
@@ -0,0 +1,216 @@
+"""
+Pool of pre-connected, pre-setup Gemini Live sessions.
+
+Without the pool, a call only opens the TLS websocket and sends the (large) setup message after the
+Waybeo `start` event, so the caller hears silence for the whole handshake. With the pool, sessions are
+connected and `setupComplete` ahead of time, keyed by their `GeminiSessionConfig` (model, voice,
+prompt, ...). A new call takes one instantly and a background task refills the pool.
+
+Idle sessions are dropped after `idle_ttl_s` (Gemini would eventually close them anyway) and are
+pinged every `health_interval_s`; dead ones are discarded.
+
+Background fills and closes are tracked tasks: `close()` cancels pending fills (their half-open
+sessions are closed by `_open`) and waits for pending closes, so nothing is left running after it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Deque, Dict, Optional, Set
+
+from event_log import get_logger
+from gemini_live import GeminiLiveSession, GeminiSessionConfig
+
+LOG = get_logger("pool")
+
+
+@dataclass
+class PoolStats:
+    hits: int = 0
+    misses: int = 0
+    connects: int = 0
+    connect_failures: int = 0
+    expired: int = 0
+    unhealthy: int = 0
+
+
+@dataclass
+class _Bucket:
+    idle: Deque[GeminiLiveSession] = field(default_factory=deque)
+    filling: int = 0
+    last_acquired: float = field(default_factory=time.monotonic)
+
+
+class GeminiSessionPool:
+    def __init__(
+        self,
+        target_size: int,
+        idle_ttl_s: float = 120.0,
+        health_interval_s: float = 15.0,
+        setup_timeout_s: float = 10.0,
+        unused_key_ttl_s: float = 3600.0,
+    ):
+        self.target_size = target_size
+        self.idle_ttl_s = idle_ttl_s
+        self.health_interval_s = health_interval_s
+        self.setup_timeout_s = setup_timeout_s
+        # Stop warming a config variant (e.g. an old prompt) nobody has asked for in this long.
+        self.unused_key_ttl_s = unused_key_ttl_s
+        self.stats = PoolStats()
+
+        self._buckets: Dict[GeminiSessionConfig, _Bucket] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Strong references: the loop only holds tasks weakly.
+        self._fills: Set[asyncio.Task] = set()
+        self._closing: Set[asyncio.Task] = set()
+
+    def _spawn(self, coro: Awaitable[None], tasks: Set[asyncio.Task]) -> None:
+        task = asyncio.ensure_future(coro)
+        tasks.add(task)
+        task.add_done_callback(lambda t: self._task_done(t, tasks))
+
+    @staticmethod
+    def _task_done(task: asyncio.Task, tasks: Set[asyncio.Task]) -> None:
+        tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            LOG.warning("pool_task_failed", error=str(task.exception()))
+
+    def _close_soon(self, session: GeminiLiveSession) -> None:
+        self._spawn(session.close(), self._closing)
+
+    def register(self, cfg: GeminiSessionConfig) -> None:
+        """Start keeping `target_size` warm sessions for this config."""
+        if cfg not in self._buckets:
+            self._buckets[cfg] = _Bucket()
+        self._wakeup.set()
+
+    def retire(self, cfg: GeminiSessionConfig) -> None:
+        """Stop warming `cfg` (e.g. the prompt changed) and close its idle sessions."""
+        bucket = self._buckets.pop(cfg, None)
+        if bucket is None:
+            return
+        while bucket.idle:
+            self._close_soon(bucket.idle.popleft())
+
+    def idle_count(self, cfg: Optional[GeminiSessionConfig] = None) -> int:
+        if cfg is not None:
+            bucket = self._buckets.get(cfg)
+            return len(bucket.idle) if bucket else 0
+        return sum(len(b.idle) for b in self._buckets.values())
+
+    async def _open(self, cfg: GeminiSessionConfig) -> GeminiLiveSession:
+        session = GeminiLiveSession(cfg)
+        try:
+            await session.connect()
+            await session.wait_setup_complete(timeout=self.setup_timeout_s)
+        except BaseException:
+            await session.close()
+            raise
+        return session
+
+    def _is_expired(self, session: GeminiLiveSession, now: float) -> bool:
+        return session.connected_at is None or now - session.connected_at > self.idle_ttl_s
+
+    async def acquire(self, cfg: GeminiSessionConfig) -> GeminiLiveSession:
+        """Return a ready (`setupComplete`) session, falling back to a fresh connect on a miss."""
+        self.register(cfg)
+        bucket = self._buckets[cfg]
+        bucket.last_acquired = time.monotonic()
+        now = time.monotonic()
+        while bucket.idle:
+            session = bucket.idle.popleft()
+            self._wakeup.set()
+            if session.is_open and not self._is_expired(session, now):
+                self.stats.hits += 1
+                return session
+            self.stats.expired += 1
+            self._close_soon(session)
+
+        self.stats.misses += 1
+        return await self._open(cfg)
+
+    async def _fill_one(self, cfg: GeminiSessionConfig, bucket: _Bucket) -> None:
+        try:
+            session = await self._open(cfg)
+            self.stats.connects += 1
+            if self._buckets.get(cfg) is bucket:
+                bucket.idle.append(session)
+            else:
+                await session.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.stats.connect_failures += 1
+            await asyncio.sleep(1.0)  # don't hammer the endpoint while it's failing
+        finally:
+            bucket.filling -= 1
+            self._wakeup.set()
+
+    async def _check_health(self, bucket: _Bucket, now: float) -> None:
+        # bucket.idle changes while we await: fills append to it and calls take from it. Only ever
+        # remove the sessions this pass found expired or dead; never rebuild the deque.
+        for session in list(bucket.idle):
+            if session not in bucket.idle:
+                continue  # acquired by a call during an earlier ping
+            if self._is_expired(session, now):
+                self.stats.expired += 1
+                bucket.idle.remove(session)
+                await session.close()
+            elif not await session.ping():
+                if session not in bucket.idle:
+                    continue  # a call took it meanwhile; it is the call's to handle now
+                self.stats.unhealthy += 1
+                bucket.idle.remove(session)
+                await session.close()
+
+    async def _maintain(self) -> None:
+        next_health = time.monotonic() + self.health_interval_s
+        while True:
+            now = time.monotonic()
+            for cfg, bucket in list(self._buckets.items()):
+                if now - bucket.last_acquired > self.unused_key_ttl_s:
+                    del self._buckets[cfg]
+                    for session in bucket.idle:
+                        await session.close()
+                    continue
+                missing = self.target_size - len(bucket.idle) - bucket.filling
+                for _ in range(max(0, missing)):
+                    bucket.filling += 1
+                    self._spawn(self._fill_one(cfg, bucket), self._fills)
+
+            if now >= next_health:
+                for bucket in list(self._buckets.values()):
+                    await self._check_health(bucket, now)
+                next_health = time.monotonic() + self.health_interval_s
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, next_health - now))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._maintain())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._fills):
+            task.cancel()
+        await asyncio.gather(*self._fills, *self._closing, return_exceptions=True)
+        for bucket in self._buckets.values():
+            for session in bucket.idle:
+                await session.close()
+            bucket.idle.clear()
+        self._buckets.clear()
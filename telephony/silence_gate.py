@@ -0,0 +1,106 @@
+"""
+Uplink silence suppression (optional, `UPLINK_SILENCE_SUPPRESSION`).
+
+Telephony calls carry long stretches of line silence and hold noise; forwarding them costs a resample,
+a base64 encode, a JSON message and egress for every chunk. `SilenceGate` sits in front of the uplink
+chunker and drops inbound audio once the `SpeechDetector` has seen no speech for its hangover
+(so Gemini still receives the trailing silence its end-of-speech detection needs):
+
+- while closed, the most recent `preroll_ms` of audio is kept; on speech onset it is forwarded ahead of
+  the voiced frame, so onsets are never clipped
+- every `keepalive_ms` of suppressed audio one real inbound frame (the line's own noise floor) is
+  forwarded, so the upstream stream never goes fully quiet
+
+`summary()` reports the fraction of inbound audio suppressed per call.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from ring_buffer import Int16RingBuffer
+from uplink_framer import SpeechDetector
+
+
+@dataclass
+class SilenceGateStats:
+    samples_in: int = 0
+    samples_suppressed: int = 0
+    keepalives: int = 0
+    openings: int = 0
+
+
+class SilenceGate:
+    def __init__(
+        self,
+        detector: SpeechDetector,
+        sample_rate: int = 8000,
+        preroll_ms: int = 300,
+        keepalive_ms: int = 1000,
+    ):
+        self.detector = detector
+        self.sample_rate = sample_rate
+        self.keepalive_samples = int(sample_rate * keepalive_ms / 1000)
+        self.stats = SilenceGateStats()
+
+        self._preroll = Int16RingBuffer(max(1, int(sample_rate * preroll_ms / 1000)))
+        self._open = True  # until the detector confirms silence
+        self._since_keepalive = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._open
+
+    def process(self, samples: np.ndarray) -> Tuple[Optional[np.ndarray], bool]:
+        """
+        Gate one inbound frame; call after `detector.update(samples)`.
+
+        Returns (audio to forward or None, flush) where `flush` asks the chunker to send whatever it
+        has buffered now (the hangover tail on closing, or a keep-alive frame).
+        """
+        st = self.stats
+        st.samples_in += samples.size
+
+        if self.detector.active:
+            if self._open:
+                return samples, False
+            # Speech onset: re-open with the pre-roll in front of the voiced frame.
+            self._open = True
+            st.openings += 1
+            if len(self._preroll):
+                st.samples_suppressed -= len(self._preroll)
+                samples = np.concatenate((self._preroll.read(len(self._preroll)), samples))
+            return samples, False
+
+        if self._open:
+            # Hangover just ran out: stop forwarding, but flush the tail that is still buffered.
+            self._open = False
+            self._preroll.clear()
+            self._since_keepalive = 0
+            self._preroll.append(samples)
+            st.samples_suppressed += samples.size
+            return None, True
+
+        self._since_keepalive += samples.size
+        if self.keepalive_samples and self._since_keepalive >= self.keepalive_samples:
+            self._since_keepalive = 0
+            st.keepalives += 1
+            # Everything older than this frame was dropped for good; the pre-roll restarts after it.
+            self._preroll.clear()
+            return samples, True
+
+        self._preroll.append(samples)
+        st.samples_suppressed += samples.size
+        return None, False
+
+    def summary(self) -> Dict[str, Any]:
+        st = self.stats
+        return {
+            "suppressed_fraction": round(st.samples_suppressed / st.samples_in, 3) if st.samples_in else 0.0,
+            "suppressed_s": round(st.samples_suppressed / self.sample_rate, 2),
+            "keepalives": st.keepalives,
+            "openings": st.openings,
+        }
@@ -0,0 +1,163 @@
+"""
+Multi-worker mode for the telephony service (`WORKERS=N`).
+
+Each worker is a separate process with its own asyncio loop, all binding the same HOST:PORT with
+SO_REUSEPORT so the kernel spreads incoming calls across cores. The parent process only supervises:
+- restarts a worker that exits unexpectedly (with backoff if it keeps crashing)
+- aggregates per-worker call counters from shared memory and logs a periodic `worker_stats` event
+- forwards SIGTERM/SIGINT to the workers on shutdown
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import signal
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from event_log import get_logger
+
+LOG = get_logger("supervisor")
+
+# Per-worker slots in the shared counter array
+_ACTIVE, _TOTAL, _FIELDS = 0, 1, 2
+
+
+class CallCounters:
+    """Call counters for one worker. Only the owning worker writes its slot, so no lock is needed."""
+
+    def __init__(self, values: Sequence[int], worker_id: int = 0):
+        self._values = values
+        self._base = worker_id * _FIELDS
+        self.worker_id = worker_id
+
+    @classmethod
+    def local(cls) -> "CallCounters":
+        return cls([0] * _FIELDS)
+
+    def call_started(self) -> None:
+        self._values[self._base + _ACTIVE] += 1
+        self._values[self._base + _TOTAL] += 1
+
+    def call_ended(self) -> None:
+        self._values[self._base + _ACTIVE] -= 1
+
+    @property
+    def active(self) -> int:
+        return self._values[self._base + _ACTIVE]
+
+    @property
+    def total(self) -> int:
+        return self._values[self._base + _TOTAL]
+
+
+WorkerTarget = Callable[[CallCounters], None]
+
+
+class Supervisor:
+    def __init__(
+        self,
+        workers: int,
+        target: WorkerTarget,
+        stats_interval_s: float = 60.0,
+        max_backoff_s: float = 30.0,
+        shutdown_timeout_s: float = 10.0,
+    ):
+        self.workers = workers
+        self.target = target
+        self.stats_interval_s = stats_interval_s
+        self.max_backoff_s = max_backoff_s
+        # Workers drain in-flight calls on SIGTERM; wait this long before killing them.
+        self.shutdown_timeout_s = shutdown_timeout_s
+
+        self._values = mp.Array("q", workers * _FIELDS, lock=False)
+        self._procs: List[Optional[mp.Process]] = [None] * workers
+        self._restarts = [0] * workers
+        self._backoff = [0.0] * workers
+        self._started_at = [0.0] * workers
+        self._stopping = False
+
+    def counters(self, worker_id: int) -> CallCounters:
+        return CallCounters(self._values, worker_id)
+
+    def _spawn(self, worker_id: int) -> None:
+        # A crashed worker's calls are gone; don't keep counting them as active.
+        self._values[worker_id * _FIELDS + _ACTIVE] = 0
+        proc = mp.Process(
+            target=self.target,
+            args=(self.counters(worker_id),),
+            name=f"telephony-worker-{worker_id}",
+            daemon=False,
+        )
+        proc.start()
+        self._procs[worker_id] = proc
+        self._started_at[worker_id] = time.monotonic()
+        LOG.info("worker_started", worker=worker_id, pid=proc.pid)
+
+    def _handle_signal(self, signum, _frame) -> None:
+        self._stopping = True
+
+    def summary(self) -> Dict[str, Any]:
+        active = [self._values[i * _FIELDS + _ACTIVE] for i in range(self.workers)]
+        total = [self._values[i * _FIELDS + _TOTAL] for i in range(self.workers)]
+        return {
+            "active": sum(active),
+            "total": sum(total),
+            "active_per_worker": active,
+            "total_per_worker": total,
+            "restarts": sum(self._restarts),
+        }
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+
+        for i in range(self.workers):
+            self._spawn(i)
+
+        next_stats = time.monotonic() + self.stats_interval_s
+        pending_restart: List[Optional[float]] = [None] * self.workers
+        while not self._stopping:
+            time.sleep(0.5)
+            now = time.monotonic()
+            for i, proc in enumerate(self._procs):
+                if pending_restart[i] is not None:
+                    if now >= pending_restart[i]:
+                        pending_restart[i] = None
+                        self._restarts[i] += 1
+                        self._spawn(i)
+                    continue
+                if proc is None or proc.is_alive():
+                    continue
+                # Crash-looping workers back off exponentially; a worker that ran a while restarts now.
+                if now - self._started_at[i] < 10.0:
+                    self._backoff[i] = min(max(self._backoff[i] * 2, 0.5), self.max_backoff_s)
+                else:
+                    self._backoff[i] = 0.0
+                LOG.warning(
+                    "worker_exited",
+                    worker=i,
+                    pid=proc.pid,
+                    exit_code=proc.exitcode,
+                    restart_in_s=self._backoff[i],
+                )
+                pending_restart[i] = now + self._backoff[i]
+            if now >= next_stats:
+                LOG.info("worker_stats", **self.summary())
+                next_stats = now + self.stats_interval_s
+
+        self.shutdown(self.shutdown_timeout_s)
+
+    def shutdown(self, timeout_s: float = 10.0) -> None:
+        for proc in self._procs:
+            if proc is not None and proc.is_alive():
+                proc.terminate()
+        deadline = time.monotonic() + timeout_s
+        for proc in self._procs:
+            if proc is None:
+                continue
+            proc.join(max(0.0, deadline - time.monotonic()))
+            if proc.is_alive():
+                proc.kill()
+                proc.join()
+        LOG.info("worker_stats", final=True, **self.summary())
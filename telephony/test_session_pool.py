@@ -0,0 +1,123 @@
+"""
+Tests for `GeminiSessionPool` bookkeeping, with fake sessions (no network).
+
+    cd telephony
+    python3 -m unittest test_session_pool
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+
+from gemini_live import GeminiSessionConfig
+from session_pool import GeminiSessionPool
+
+CFG = GeminiSessionConfig(
+    service_url="ws://stand-in", model_uri="models/test", voice="Kore", system_instructions="test"
+)
+
+
+class FakeSession:
+    def __init__(self, name: str, ping_delay_s: float = 0.0, healthy: bool = True):
+        self.name = name
+        self.connected_at = time.monotonic()
+        self.ping_delay_s = ping_delay_s
+        self.healthy = healthy
+        self.closed = False
+
+    @property
+    def is_open(self) -> bool:
+        return not self.closed
+
+    async def ping(self) -> bool:
+        await asyncio.sleep(self.ping_delay_s)
+        return self.healthy
+
+    async def close(self) -> None:
+        await asyncio.sleep(0)
+        self.closed = True
+
+
+class SessionPoolTest(unittest.IsolatedAsyncioTestCase):
+    def make_pool(self, opened: list, open_delay_s: float = 0.0) -> GeminiSessionPool:
+        pool = GeminiSessionPool(target_size=2)
+
+        async def fake_open(cfg):
+            await asyncio.sleep(open_delay_s)
+            session = FakeSession(f"fill-{len(opened)}")
+            opened.append(session)
+            return session
+
+        pool._open = fake_open
+        pool.register(CFG)
+        return pool
+
+    async def test_fill_finishing_during_ping_is_kept(self):
+        opened: list = []
+        pool = self.make_pool(opened)
+        bucket = pool._buckets[CFG]
+        slow = FakeSession("slow", ping_delay_s=0.05)
+        bucket.idle.append(slow)
+
+        async def fill_during_ping():
+            await asyncio.sleep(0.01)
+            bucket.filling += 1
+            await pool._fill_one(CFG, bucket)
+
+        await asyncio.gather(pool._check_health(bucket, time.monotonic()), fill_during_ping())
+
+        self.assertEqual(len(opened), 1)
+        self.assertEqual(list(bucket.idle), [slow, opened[0]])
+        self.assertFalse(opened[0].closed)
+        await pool.close()
+        self.assertTrue(all(s.closed for s in [slow, *opened]))
+
+    async def test_dead_session_removed_and_closed(self):
+        pool = self.make_pool([])
+        bucket = pool._buckets[CFG]
+        dead = FakeSession("dead", healthy=False)
+        alive = FakeSession("alive")
+        bucket.idle.extend([dead, alive])
+
+        await pool._check_health(bucket, time.monotonic())
+
+        self.assertEqual(list(bucket.idle), [alive])
+        self.assertTrue(dead.closed)
+        self.assertEqual(pool.stats.unhealthy, 1)
+        await pool.close()
+
+    async def test_session_acquired_during_ping_is_left_to_the_call(self):
+        pool = self.make_pool([])
+        bucket = pool._buckets[CFG]
+        flaky = FakeSession("flaky", ping_delay_s=0.05, healthy=False)
+        bucket.idle.append(flaky)
+
+        check = asyncio.ensure_future(pool._check_health(bucket, time.monotonic()))
+        await asyncio.sleep(0.01)
+        taken = await pool.acquire(CFG)
+        await check
+
+        self.assertIs(taken, flaky)
+        self.assertFalse(flaky.closed)
+        await pool.close()
+
+    async def test_close_waits_for_background_work(self):
+        opened: list = []
+        pool = self.make_pool(opened, open_delay_s=0.05)
+        pool.start()
+        await asyncio.sleep(0.01)  # fills are in flight
+        self.assertEqual(len(pool._fills), 2)
+
+        await pool.close()
+
+        self.assertFalse(pool._fills)
+        self.assertFalse(pool._closing)
+        self.assertEqual(opened, [])  # cancelled before connecting
+        await asyncio.sleep(0.1)
+        self.assertEqual(opened, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+"""
+Process-wide Google OAuth access token cache for Gemini Live connections.
+
+`google.auth.default()` and `creds.refresh(Request())` are blocking HTTP round trips to the
+metadata server / token endpoint. Running them inline in `GeminiLiveSession.connect()` stalls the
+event loop (and therefore audio for every other live call in the process), so instead:
+- one `AccessTokenCache` per process owns the credentials
+- refreshes run in a worker thread, ahead of expiry, from a background task
+- callers get the cached bearer token instantly via `get_token()`
+- `on_refresh(seconds, error)` reports every refresh attempt (metrics / logs)
+
+The module has no imports from this repo, so the browser proxy (`server.py`) shares it as
+`telephony.token_cache`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import google.auth
+from google.auth.transport.requests import Request
+
+
+@dataclass
+class TokenCacheStats:
+    refreshes: int = 0
+    refresh_failures: int = 0
+
+
+class AccessTokenCache:
+    def __init__(self, refresh_margin_s: float = 300.0, retry_s: float = 5.0, max_retry_s: float = 60.0):
+        # Refresh this long before the token expires (Google tokens live ~60 min).
+        self.refresh_margin_s = refresh_margin_s
+        self.retry_s = retry_s
+        self.max_retry_s = max_retry_s
+        self.stats = TokenCacheStats()
+        # Called with (seconds, error or None) after every refresh attempt, on the event loop.
+        self.on_refresh: Optional[Callable[[float, Optional[str]], None]] = None
+
+        self._creds: Any = None
+        self._token: Optional[str] = None
+        self._expiry: Optional[dt.datetime] = None  # naive UTC, as returned by google-auth
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_refresh_at = 0.0
+        self._static = False
+
+    def _refresh_blocking(self) -> None:
+        # Runs in a worker thread; never on the event loop.
+        if self._creds is None:
+            self._creds, _ = google.auth.default()
+        self._creds.refresh(Request())
+        self._token = self._creds.token
+        self._expiry = self._creds.expiry
+
+    def _seconds_until_expiry(self) -> float:
+        if self._token is None:
+            return 0.0
+        if self._expiry is None:
+            # Credentials without an expiry (e.g. some user creds) never need a proactive refresh.
+            return float("inf")
+        now = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+        return (self._expiry - now).total_seconds()
+
+    def _is_fresh(self) -> bool:
+        return self._seconds_until_expiry() > 0
+
+    async def refresh(self) -> str:
+        """Refresh the token off the event loop; concurrent callers share one refresh."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        started = time.perf_counter()
+        async with self._lock:
+            # Another caller may have refreshed while we waited on the lock.
+            if self._token is not None and self._last_refresh_at >= started:
+                return self._token
+            loop = asyncio.get_running_loop()
+            t0 = time.perf_counter()
+            try:
+                await loop.run_in_executor(None, self._refresh_blocking)
+            except Exception as e:
+                self.stats.refresh_failures += 1
+                if self.on_refresh is not None:
+                    self.on_refresh(time.perf_counter() - t0, str(e))
+                raise
+            self._last_refresh_at = time.perf_counter()
+            self.stats.refreshes += 1
+            if self.on_refresh is not None:
+                self.on_refresh(self._last_refresh_at - t0, None)
+            return self._token  # type: ignore[return-value]
+
+    async def get_token(self) -> str:
+        """Return the cached bearer token, refreshing only if it is missing or already expired."""
+        if self._token is not None and self._is_fresh():
+            return self._token
+        return await self.refresh()
+
+    async def _refresh_loop(self) -> None:
+        backoff = self.retry_s
+        while True:
+            delay = self._seconds_until_expiry() - self.refresh_margin_s
+            if delay > 0:
+                await asyncio.sleep(min(delay, 3600.0))
+                continue
+            try:
+                await self.refresh()
+                backoff = self.retry_s
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Keep serving the old token (if still valid) and retry with backoff.
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_retry_s)
+
+    def use_static_token(self, token: str) -> None:
+        """Serve a fixed token and never call google-auth (local stand-ins / load tests)."""
+        self._static = True
+        self._token = token
+        self._expiry = None
+
+    def start(self) -> None:
+        """Start the background refresher on the running loop (idempotent)."""
+        if self._static:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+
+_shared: Optional[AccessTokenCache] = None
+
+
+def get_token_cache() -> AccessTokenCache:
+    """Process-wide token cache shared by every Gemini session."""
+    global _shared
+    if _shared is None:
+        _shared = AccessTokenCache()
+    return _shared
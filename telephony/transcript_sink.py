@@ -0,0 +1,220 @@
+"""
+Batched transcript storage (optional, `TRANSCRIPT_DB`).
+
+With transcription enabled Gemini streams the caller's words (`serverContent.inputTranscription`) and
+the agent's (`serverContent.outputTranscription`) as many small text fragments per turn.
+`CallTranscript` coalesces them in memory on the event loop (a string append, no I/O) and emits one
+row per speaker per turn when the turn ends (`turnComplete`, `interrupted`, or hangup).
+
+`TranscriptSink` collects those rows from every call in the worker and writes them to a local SQLite
+database in one transaction per batch - every `flush_rows` rows or `flush_ms`, whichever comes
+first - on a single dedicated writer thread, so a live call never waits on a database round trip.
+If the writer falls behind by more than `max_pending` rows, new rows are dropped and counted.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from event_log import get_logger
+
+LOG = get_logger("transcripts")
+
+ROLE_CALLER = "caller"
+ROLE_AGENT = "agent"
+
+# (ucid, turn, role, text, started_at, ended_at, interrupted)
+TranscriptRow = Tuple[str, int, str, str, float, float, int]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id          INTEGER PRIMARY KEY,
+    ucid        TEXT    NOT NULL,
+    turn        INTEGER NOT NULL,
+    role        TEXT    NOT NULL,
+    text        TEXT    NOT NULL,
+    started_at  REAL    NOT NULL,
+    ended_at    REAL    NOT NULL,
+    interrupted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS transcripts_ucid ON transcripts (ucid, turn);
+"""
+
+_INSERT = (
+    "INSERT INTO transcripts (ucid, turn, role, text, started_at, ended_at, interrupted) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+@dataclass
+class TranscriptSinkStats:
+    rows_written: int = 0
+    rows_dropped: int = 0
+    batches: int = 0
+    write_errors: int = 0
+    max_batch: int = 0
+
+
+class TranscriptSink:
+    def __init__(self, path: str, flush_rows: int = 50, flush_ms: int = 500, max_pending: int = 10000):
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_s = flush_ms / 1000.0
+        self.max_pending = max_pending
+        self.stats = TranscriptSinkStats()
+
+        self._rows: List[TranscriptRow] = []
+        self._due = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # One thread owns the connection: sqlite3 connections are not shared across threads.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="transcript-db")
+        self._db: Optional[sqlite3.Connection] = None
+
+    # ---- writer thread ----
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Workers share the file; WAL + busy timeout lets their batches interleave.
+        self._db = sqlite3.connect(self.path, timeout=10.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def _write(self, batch: List[TranscriptRow]) -> None:
+        assert self._db is not None
+        with self._db:
+            self._db.executemany(_INSERT, batch)
+
+    def _close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ---- event loop side ----
+    async def start(self) -> None:
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._open)
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, row: TranscriptRow) -> None:
+        if len(self._rows) >= self.max_pending:
+            self.stats.rows_dropped += 1
+            return
+        self._rows.append(row)
+        if len(self._rows) >= self.flush_rows:
+            self._due.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._due.wait(), self.flush_s)
+            except asyncio.TimeoutError:
+                pass
+            self._due.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._rows:
+            return
+        batch, self._rows = self._rows, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write, batch)
+        except Exception as e:
+            self.stats.write_errors += 1
+            self.stats.rows_dropped += len(batch)
+            LOG.error("transcript_write_failed", rows=len(batch), error=str(e))
+            return
+        st = self.stats
+        st.batches += 1
+        st.rows_written += len(batch)
+        st.max_batch = max(st.max_batch, len(batch))
+
+    async def close(self) -> None:
+        """Write whatever is pending and close the database."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._flush()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close)
+        self._executor.shutdown(wait=False)
+
+    def summary(self) -> Dict[str, Any]:
+        st = self.stats
+        return {
+            "rows_written": st.rows_written,
+            "rows_dropped": st.rows_dropped,
+            "batches": st.batches,
+            "max_batch": st.max_batch,
+            "write_errors": st.write_errors,
+        }
+
+
+class CallTranscript:
+    """Per-call coalescing of transcription fragments into one row per speaker per turn."""
+
+    def __init__(self, sink: TranscriptSink, ucid: str):
+        self.sink = sink
+        self.ucid = ucid
+        self.turn = 0
+        self.fragments = 0
+        self.rows = 0
+        # role -> [text parts, first fragment time]
+        self._open: Dict[str, Tuple[List[str], float]] = {}
+
+    def _add(self, role: str, text: Any) -> None:
+        if not isinstance(text, str) or not text:
+            return
+        self.fragments += 1
+        parts = self._open.get(role)
+        if parts is None:
+            self._open[role] = ([text], time.time())
+        else:
+            parts[0].append(text)
+
+    def on_message(self, msg: Dict[str, Any]) -> None:
+        """Feed every Gemini message; cheap no-op for messages without transcription or turn events."""
+        sc = msg.get("serverContent")
+        if not sc:
+            return
+        inp = sc.get("inputTranscription")
+        if inp:
+            self._add(ROLE_CALLER, inp.get("text"))
+        out = sc.get("outputTranscription")
+        if out:
+            self._add(ROLE_AGENT, out.get("text"))
+        if sc.get("interrupted"):
+            self.end_turn(interrupted=True)
+        elif sc.get("turnComplete"):
+            self.end_turn()
+
+    def end_turn(self, interrupted: bool = False) -> None:
+        if not self._open:
+            return
+        ended = time.time()
+        # Caller first: they spoke before the agent answered.
+        for role in (ROLE_CALLER, ROLE_AGENT):
+            entry = self._open.pop(role, None)
+            if entry is None:
+                continue
+            text = "".join(entry[0]).strip()
+            if text:
+                self.sink.put((self.ucid, self.turn, role, text, entry[1], ended, int(interrupted)))
+                self.rows += 1
+        self.turn += 1
+
+    def close(self) -> None:
+        self.end_turn()
+
+    def summary(self) -> Dict[str, Any]:
+        return {"turns": self.turn, "fragments": self.fragments, "rows": self.rows}
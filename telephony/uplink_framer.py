@@ -0,0 +1,134 @@
+"""
+Adaptive uplink frame sizing for the Waybeo -> Gemini direction.
+
+A fixed `AUDIO_BUFFER_MS_INPUT` (200ms) holds every caller utterance back by up to one buffer before
+Gemini hears it, and the trailing silence that drives Gemini's end-of-speech detection
+(`vad_silence_ms`) arrives just as late. Here a cheap per-frame energy + zero-crossing detector on the
+8kHz input picks the chunk size instead:
+
+- caller speaking, or within `hangover_ms` of the last voiced frame: small `active` chunks (20-40ms);
+  on speech onset everything already buffered is flushed in one message
+- steady silence: the large `idle` chunk (`AUDIO_BUFFER_MS_INPUT`), keeping the message rate low
+
+`UplinkFramerStats` counts messages against what the fixed chunker would have sent and estimates
+the mean time a speech-time sample spends buffered, so a trace shows the latency saved vs. the extra messages.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import numpy as np
+
+
+class SpeechDetector:
+    def __init__(
+        self,
+        sample_rate: int = 8000,
+        rms_threshold: float = 500.0,
+        zcr_max: float = 0.35,
+        hangover_ms: int = 400,
+    ):
+        self.rms_threshold = rms_threshold
+        # Broadband noise / hiss crosses zero on ~half the samples; voiced speech at 8kHz far less.
+        self.zcr_max = zcr_max
+        self.hangover_samples = int(sample_rate * hangover_ms / 1000)
+        self._since_voice = self.hangover_samples + 1  # start silent
+
+    @property
+    def active(self) -> bool:
+        """Voiced now, or still inside the hangover after the last voiced frame."""
+        return self._since_voice <= self.hangover_samples
+
+    def update(self, samples: np.ndarray) -> bool:
+        """Classify one inbound frame. Returns True if the frame itself is voiced."""
+        n = samples.size
+        if not n:
+            return False
+        x = samples.astype(np.float32)
+        rms = float(np.sqrt(np.dot(x, x) / n))
+        voiced = False
+        if rms >= self.rms_threshold:
+            neg = x < 0
+            zcr = np.count_nonzero(neg[1:] != neg[:-1]) / max(1, n - 1)
+            voiced = zcr <= self.zcr_max
+        if voiced:
+            self._since_voice = 0
+        else:
+            self._since_voice += n
+        return voiced
+
+
+@dataclass
+class UplinkFramerStats:
+    messages: int = 0
+    samples: int = 0
+    active_messages: int = 0
+    active_samples: int = 0
+    # sum over speech-time chunks of n * (n / 2): sample-weighted buffering time, in samples^2
+    active_hold: float = 0.0
+
+
+class AdaptiveUplinkFramer:
+    def __init__(
+        self,
+        detector: SpeechDetector,
+        idle_samples: int,
+        active_samples: int,
+        sample_rate: int = 8000,
+        adaptive: bool = True,
+    ):
+        self.detector = detector
+        self.idle_samples = idle_samples
+        self.active_samples = max(1, min(active_samples, idle_samples))
+        self.sample_rate = sample_rate
+        self.adaptive = adaptive
+        self.stats = UplinkFramerStats()
+
+    def next_chunk(self, buffered: int, flush: bool = False) -> int:
+        """Samples to send now out of `buffered` (0 = keep buffering); `flush` sends all of it."""
+        active = self.adaptive and self.detector.active
+        if flush:
+            if not buffered:
+                return 0
+            n = buffered
+        elif active:
+            if buffered < self.active_samples:
+                return 0
+            # Onset after silence: flush the whole backlog at once rather than N small messages.
+            n = buffered - buffered % self.active_samples
+        else:
+            if buffered < self.idle_samples:
+                return 0
+            n = self.idle_samples
+
+        st = self.stats
+        st.messages += 1
+        st.samples += n
+        if active:
+            st.active_messages += 1
+            st.active_samples += n
+            st.active_hold += n * n / 2.0
+        return n
+
+    def summary(self) -> Dict[str, Any]:
+        st = self.stats
+        fixed_messages = st.samples // self.idle_samples
+        # Mean time a speech-time sample waits in the buffer (frames arrive in real time), vs. the
+        # fixed chunker where every sample waits half an idle chunk on average.
+        fixed_hold_ms = self.idle_samples / 2.0 * 1000.0 / self.sample_rate
+        hold_ms = (
+            st.active_hold / st.active_samples * 1000.0 / self.sample_rate
+            if st.active_samples
+            else fixed_hold_ms
+        )
+        return {
+            "messages": st.messages,
+            "fixed_messages": fixed_messages,
+            "extra_messages": st.messages - fixed_messages,
+            "active_fraction": round(st.active_samples / st.samples, 3) if st.samples else 0.0,
+            "speech_hold_ms": round(hold_ms, 1),
+            "fixed_hold_ms": round(fixed_hold_ms, 1),
+            "hold_saved_ms": round(fixed_hold_ms - hold_ms, 1),
+        }